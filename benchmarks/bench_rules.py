@@ -0,0 +1,120 @@
+"""Benchmarks of game rules, they do not need pyglet"""
+from __future__ import annotations
+
+import random
+
+from common import measure
+
+from game import vectorized
+from game.constants import FEATURES_NORMAL, FEATURES_QUICKSTART, FeatSwitch
+from game.engine import (
+    CARDS,
+    Game,
+    check_if_cards_are_set,
+    create_deck,
+    find_sets,
+    get_rules,
+    new_game,
+    select_features,
+)
+from game.simulation import play_game
+from game.solver import Solver
+
+BOARD_SIZES = (12, 15, 18, 21)
+DECKS = {
+    27: FeatSwitch(pattern=False, number=True, shape=True, color_name=True),
+    81: FeatSwitch(pattern=True, number=True, shape=True, color_name=True),
+}
+# (features, values) of variant decks, played on boards of 20 to 30 cards
+VARIANTS = ((5, 3), (6, 3), (4, 4), (3, 5))
+VARIANT_BOARD_SIZES = (20, 30)
+# boards of 81 card deck scanned at once by numpy, when it is installed
+BATCH_BOARDS = 1000
+BATCH_BOARD_SIZES = (12, 21)
+
+
+def _game(deck_size, board_size, seed=0):
+    """Game with board of given size, board is dealt in columns of three"""
+    rng = random.Random(seed)
+    cards = select_features(create_deck(), DECKS[deck_size], rng)
+    return Game(cards, rows=3, cols=board_size // 3, rng=rng)
+
+
+def run():
+    results = {}
+    deck = create_deck()
+    for deck_size, switch in DECKS.items():
+        rng = random.Random(0)
+        results[f"select_features[deck={deck_size}]"] = measure(
+            lambda: select_features(deck, switch, rng)
+        )
+
+        for board_size in BOARD_SIZES:
+            key = f"deck={deck_size},board={board_size}"
+            game = _game(deck_size, board_size)
+            board = game.cards_on_board()
+            triple = board[:3]
+            slot = 0
+            card = game.board[slot]
+
+            # take card from board and put it back in the same slot
+            def update_board():
+                game._take(slot)
+                game._put(slot, card)
+
+            results[f"check_if_cards_are_set[{key}]"] = measure(
+                lambda: check_if_cards_are_set(triple)
+            )
+            # Cards.check_if_set_exists_in_cards_used
+            results[f"is_over[{key}]"] = measure(game.is_over)
+            # Cards.get_two_cards_from_random_set
+            results[f"hint[{key}]"] = measure(game.hint)
+            results[f"find_sets[{key}]"] = measure(lambda: find_sets(board))
+            results[f"board_update[{key}]"] = measure(update_board)
+
+    if vectorized.available():
+        for board_size in BATCH_BOARD_SIZES:
+            key = f"boards={BATCH_BOARDS},board={board_size}"
+            rng = random.Random(0)
+            card_boards = [rng.sample(CARDS, board_size) for _ in range(BATCH_BOARDS)]
+            features = vectorized.features_from_ids(
+                [[c.id for c in board] for board in card_boards]
+            )
+            results[f"find_sets_batch[{key}]"] = measure(
+                lambda: vectorized.find_sets_batch(features), repeat=3
+            )
+            # the same boards one by one in pure Python, for comparison
+            results[f"find_sets_loop[{key}]"] = measure(
+                lambda: [find_sets(board) for board in card_boards], repeat=3
+            )
+
+    for n_features, n_values in VARIANTS:
+        rules = get_rules(n_features, n_values)
+        for board_size in VARIANT_BOARD_SIZES:
+            key = f"deck={n_features}x{n_values},board={board_size}"
+            rng = random.Random(0)
+            game = Game(rules.cards, 5, board_size // 5, rng=rng, rules=rules)
+            board = game.cards_on_board()
+            slot = 0
+            card = game.board[slot]
+
+            def update_board():
+                game._take(slot)
+                game._put(slot, card)
+
+            results[f"Rules.find_sets[{key}]"] = measure(
+                lambda: rules.find_sets(board), repeat=3
+            )
+            results[f"board_update[{key}]"] = measure(update_board, repeat=3)
+
+    for mode in (FEATURES_QUICKSTART, FEATURES_NORMAL):
+        seeds = iter(range(10**9))
+        results[f"simulated_game[mode={mode}]"] = measure(
+            lambda: play_game(next(seeds), mode), repeat=3
+        )
+        # the same deal every time, table is not shared between solves
+        game = new_game(0, mode)
+        results[f"solve[mode={mode},seed=0]"] = measure(
+            lambda: Solver(game).solve(), repeat=3
+        )
+    return results
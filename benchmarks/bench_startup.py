@@ -0,0 +1,64 @@
+"""Benchmarks of start up path and card views, they need headless pyglet"""
+from __future__ import annotations
+
+import os
+import tempfile
+
+from common import measure, setup_headless
+
+from bench_rules import BOARD_SIZES, DECKS
+
+
+def run():
+    setup_headless()
+    import pyglet
+
+    from game.board import BoardRenderer
+    from game.cards import Cards
+    from game.director import GameDirector
+    from game.engine import CARDS
+    from game.resources import read_images_from_disk
+
+    results = {}
+    window = pyglet.window.Window(visible=False)
+
+    card_scale = 0.8
+    cache = os.environ.get("SET_GAME_CACHE")
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SET_GAME_CACHE"] = tmp
+        # the first call decodes png and fills empty cache
+        results["read_images_from_disk[cold]"] = measure(
+            lambda: read_images_from_disk(card_scale), repeat=1, number=1
+        )
+        results["read_images_from_disk[cached]"] = measure(
+            lambda: read_images_from_disk(card_scale), repeat=3
+        )
+        seq = read_images_from_disk(card_scale)
+    if cache is None:
+        del os.environ["SET_GAME_CACHE"]
+    else:
+        os.environ["SET_GAME_CACHE"] = cache
+
+    batch = pyglet.graphics.Batch()
+    renderer = BoardRenderer(seq, card_scale / seq.scale, batch)
+    board = list(CARDS[:15])
+    positions = [(i * 100, i * 50) for i in range(len(board))]
+    results["BoardRenderer.update[board=15]"] = measure(
+        lambda: renderer.update(board, positions)
+    )
+    window.close()
+
+    director = GameDirector(width=1024, height=600, visible=False)
+    for deck_size, switch in DECKS.items():
+        for board_size in BOARD_SIZES:
+            key = f"deck={deck_size},board={board_size}"
+            cards = Cards(director, rows=3, cols=board_size // 3, feat_switch=switch)
+            results[f"Cards.check_if_set_exists_in_cards_used[{key}]"] = measure(
+                cards.check_if_set_exists_in_cards_used
+            )
+            results[f"Cards.get_two_cards_from_random_set[{key}]"] = measure(
+                cards.get_two_cards_from_random_set
+            )
+            cards.remove_all()
+    director.close()
+    return results
@@ -0,0 +1,43 @@
+"""Helpers shared by benchmark scripts"""
+from __future__ import annotations
+
+import os
+import statistics
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def setup_headless():
+    """Configure pyglet to run without display, before any window is created"""
+    import pyglet
+
+    pyglet.options["headless"] = True
+    pyglet.resource.path = [str(ROOT / "res")]
+    pyglet.resource.reindex()
+    # benchmark games must not replace autosave of the player
+    save_dir = tempfile.mkdtemp(prefix="set-game-bench-")
+    os.environ.setdefault("SET_GAME_SAVE", os.path.join(save_dir, "autosave.sgs"))
+
+
+def measure(func, repeat=5, number=None):
+    """Time function call
+
+    :param number: calls in one timing run, by default it is chosen
+        so that single run takes at least 0.2 s
+    :return: Dictionary with best and median time of single call in microseconds
+    """
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    times = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "number": number,
+        "repeat": repeat,
+        "best_us": min(times),
+        "median_us": statistics.median(times),
+    }
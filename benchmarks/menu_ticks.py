@@ -0,0 +1,71 @@
+"""Regression benchmark for menu state
+
+Batch size and frame time have to stay flat while menu is open.
+Runs headless, from repository root:
+
+    python benchmarks/menu_ticks.py --ticks 10000
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+
+from common import setup_headless
+
+setup_headless()
+
+from game.configuration import config  # noqa: E402
+from game.director import GameDirector  # noqa: E402
+from game.profiler import batch_stats  # noqa: E402
+
+
+def run(ticks, window_size):
+    """Tick menu state and collect frame time and batch size per window of ticks
+
+    :return: List of (tick, median frame time in ms, batch size) tuples
+    """
+    director = GameDirector(width=1024, height=600, caption="Set Game")
+    results = []
+    frame_times = []
+    for tick in range(1, ticks + 1):
+        start = time.perf_counter()
+        director.update(1 / config.game_loop.logic_hz)
+        director.on_draw()
+        frame_times.append(time.perf_counter() - start)
+        if tick % window_size == 0:
+            median_ms = statistics.median(frame_times) * 1000
+            results.append((tick, median_ms, batch_stats(director.batch)["vertices"]))
+            frame_times = []
+    director.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=10_000)
+    parser.add_argument("--window", type=int, default=1_000, help="ticks per sample")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="allowed ratio of last to first median frame time",
+    )
+    args = parser.parse_args()
+
+    results = run(args.ticks, args.window)
+    print(f"{'tick':>8} {'frame ms':>10} {'vertices':>10}")
+    for tick, median_ms, size in results:
+        print(f"{tick:>8} {median_ms:>10.3f} {size:>10}")
+
+    (_, first_ms, first_size), (_, last_ms, last_size) = results[0], results[-1]
+    if last_size != first_size:
+        sys.exit(f"FAIL: batch grew from {first_size} to {last_size} vertices")
+    if last_ms > first_ms * args.tolerance:
+        sys.exit(f"FAIL: frame time grew from {first_ms:.3f} ms to {last_ms:.3f} ms")
+    print("OK: batch size and frame time are flat")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Run benchmark suites and save results as JSON
+
+    python benchmarks/run.py -o results.json
+    python benchmarks/run.py --suite rules --compare results.json
+
+Suite "rules" needs only Python, "startup" needs pyglet with headless (EGL) support.
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+
+from common import ROOT
+
+import bench_rules
+import bench_startup
+
+SUITES = {
+    "rules": bench_rules.run,
+    "startup": bench_startup.run,
+}
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _meta():
+    from game import vectorized
+
+    return {
+        "commit": _commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": vectorized.available(),
+    }
+
+
+def compare(results, baseline):
+    """Print ratio of current to baseline median time for common benchmarks"""
+    print(f"{'benchmark':<70} {'base us':>10} {'now us':>10} {'ratio':>7}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]["median_us"]
+        now = result["median_us"]
+        print(f"{name:<70} {base:>10.2f} {now:>10.2f} {now / base:>7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Set Game benchmarks")
+    parser.add_argument(
+        "--suite", choices=sorted(SUITES), action="append", help="default: all"
+    )
+    parser.add_argument("-o", "--output", help="save results to JSON file")
+    parser.add_argument("--compare", help="JSON file with results of previous run")
+    args = parser.parse_args()
+
+    results = {}
+    for suite in args.suite or SUITES:
+        for name, result in SUITES[suite]().items():
+            results[f"{suite}.{name}"] = result
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f)["results"])
+    else:
+        for name, result in results.items():
+            print(f"{name:<70} {result['median_us']:>12.2f} us")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": _meta(), "results": results}, f, indent=2)
+        print(f"Results saved to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Leak check of scene teardown
+
+Every cycle starts a game, plays it to the end and goes back to menu.
+Batch has to return to the same size after every cycle.
+Runs headless, from repository root:
+
+    python benchmarks/transitions.py --cycles 100
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+
+from common import setup_headless
+
+setup_headless()
+
+from game.director import GameDirector  # noqa: E402
+from game.profiler import batch_stats  # noqa: E402
+from game.scene import untracked  # noqa: E402
+
+
+def play_to_end(director):
+    """Play the first set on board until the game is over"""
+    game = director.cards.game
+    while not game.is_over():
+        director.cards.card_clicked = list(game.sets[0])
+        director.fsm.mark_dirty()
+        director.fsm.execute()
+
+
+def run(cycles):
+    """:return: List of (cycle, batch vertices, labels and shapes, untracked)"""
+    director = GameDirector(width=1024, height=600, caption="Set Game")
+    director.fsm.execute()
+
+    results = []
+    for cycle in range(1, cycles + 1):
+        director.fsm.states["MENU"].start_game()
+        director.fsm.execute()
+        play_to_end(director)
+        director.fsm.transition("toMENU")
+        director.fsm.execute()
+        stats = batch_stats(director.batch)
+        results.append(
+            (
+                cycle,
+                stats["vertices"],
+                stats["labels"] + stats["shapes"],
+                untracked(stats, [*director.scenes.values(), director.slot_outlines]),
+            )
+        )
+    director.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=100)
+    args = parser.parse_args()
+
+    results = run(args.cycles)
+    print(f"{'cycle':>8} {'vertices':>10} {'objects':>10} {'untracked':>10}")
+    for row in results[:3] + results[-3:]:
+        print("".join(f"{value:>10}" if i else f"{value:>8}" for i, value in enumerate(row)))
+
+    sizes = {row[1:3] for row in results}
+    leaked = max(row[3] for row in results)
+    if len(sizes) != 1:
+        sys.exit(f"FAIL: batch size changed between cycles: {sorted(sizes)}")
+    if leaked:
+        sys.exit(f"FAIL: {leaked} labels or shapes are not in any scene")
+    print("OK: batch returns to the same size after every cycle")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Drawing of all cards on board with one vertex list
+
+Every board slot is one quad over the shared spritesheet texture,
+so laying out the board is a single write of positions and texture
+coordinates, however many cards are moved or replaced.
+Empty slot is a quad of zero size.
+"""
+from __future__ import annotations
+
+import pyglet
+from pyglet.gl import GL_ONE_MINUS_SRC_ALPHA, GL_SRC_ALPHA, GL_TRIANGLES
+
+# triangles of one quad, vertices are counter-clockwise from bottom left
+_QUAD_INDICES = (0, 1, 2, 0, 2, 3)
+_EMPTY_QUAD = (0.0,) * 12
+
+
+class BoardRenderer:
+    """Quads of all board slots in one vertex list of the batch
+
+    :param images: game.resources.CardImages of the spritesheet
+    :param scale: scale of card images, texture can be already scaled
+    :param slots: number of slots to reserve, list grows when needed
+    """
+
+    def __init__(self, images, scale, batch=None, group=None, slots=15):
+        self.images = images
+        self.batch = batch
+        self.card_width = round(images.item_width * scale)
+        self.card_height = round(images.item_height * scale)
+        self._program = pyglet.sprite.get_default_shader()
+        self.group = pyglet.sprite.SpriteGroup(
+            images.texture,
+            GL_SRC_ALPHA,
+            GL_ONE_MINUS_SRC_ALPHA,
+            self._program,
+            group,
+        )
+        self._vertex_list = None
+        self._capacity = 0
+        self._reserve(slots)
+
+    def _reserve(self, slots):
+        """Create vertex list for given number of slots, all of them empty"""
+        if self._vertex_list is not None:
+            self._vertex_list.delete()
+        indices = [4 * slot + i for slot in range(slots) for i in _QUAD_INDICES]
+        self._vertex_list = self._program.vertex_list_indexed(
+            4 * slots,
+            GL_TRIANGLES,
+            indices,
+            self.batch,
+            self.group,
+            position=("f", _EMPTY_QUAD * slots),
+            colors=("Bn", (255,) * 16 * slots),
+            translate=("f", (0.0,) * 12 * slots),
+            scale=("f", (1.0,) * 8 * slots),
+            rotation=("f", (0.0,) * 4 * slots),
+            tex_coords=("f", _EMPTY_QUAD * slots),
+        )
+        self._capacity = slots
+
+    def update(self, cards, positions):
+        """Draw board in one buffer write
+
+        :param cards: engine card of every slot, None for empty slot
+        :param positions: bottom left corner (x, y) of every slot
+        """
+        if len(cards) > self._capacity:
+            self._reserve(len(cards))
+        w, h = self.card_width, self.card_height
+        position = []
+        tex_coords = []
+        for card, (x, y) in zip(cards, positions):
+            if card is None:
+                position += _EMPTY_QUAD
+                tex_coords += _EMPTY_QUAD
+            else:
+                position += (x, y, 0, x + w, y, 0, x + w, y + h, 0, x, y + h, 0)
+                tex_coords += self.images[card.id].tex_coords
+        for _ in range(self._capacity - len(cards)):
+            position += _EMPTY_QUAD
+            tex_coords += _EMPTY_QUAD
+        self._vertex_list.position[:] = position
+        self._vertex_list.tex_coords[:] = tex_coords
+
+    def clear(self):
+        """Remove all cards from screen, vertex list stays for the next game"""
+        self.update((), ())
+
+    def delete(self):
+        self._vertex_list.delete()
+        self._vertex_list = None
+        self._capacity = 0
+
+    def __len__(self):
+        return self._capacity
@@ -1,210 +1,304 @@
 from __future__ import annotations
 
-import itertools
 import random
-from itertools import combinations
+from collections import namedtuple
 
-import pyglet
 from pyglet.shapes import Box
 
 from .configuration import config
-from .constants import COLORS, FEATURES, NUMBERS, PATTERNS, SHAPES
-
-
-class Card(pyglet.sprite.Sprite):
-    """Single Card sprite object"""
-
-    def __init__(self, img, card_color, card_shape, card_pattern, card_number):
-        super().__init__(img)
-        self.color_name = card_color
-        self.shape = card_shape
-        self.pattern = card_pattern
-        self.number = card_number
-        self._outline = None
-
-    def outline_draw(self, batch, group):
-        self._outline = Box(
-            self.x,
-            self.y,
-            self.width + config.outline_box.size,
-            self.height + config.outline_box.size,
-            thickness=config.outline_box.thickness,
-            color=config.outline_box.color,
-            batch=batch,
-            group=group,
-        )
-        self._outline.draw()
+from .constants import FEATURES
+from .engine import CLASSIC, Game, create_deck, select_features
+from .gamelog import DEAL, played_slots
+
+# bottom left corner of the first slot, distance between slots
+# and shift of all columns when one more column is added
+BoardLayout = namedtuple("BoardLayout", "x y column_width row_height new_column_shift")
+# width to height of a card
+CARD_ASPECT = 1.5
 
-    def outline_delete(self):
-        try:
-            self._outline.delete()
-        except AttributeError:
-            pass
 
-    def __str__(self):
-        return f"Card: {self.color_name}, {self.shape}, {self.pattern}, {self.number}, {(self.x, self.y, self.width, self.height)}"
+def classic_layout():
+    """Layout of 3 x 4 board of the classic game from configuration"""
+    return BoardLayout(
+        config.corner_margin.x,
+        config.corner_margin.y,
+        config.cards_layout.column_width,
+        config.cards_layout.row_height,
+        config.cards_layout.new_column_shift,
+    )
+
+
+def fit_layout(rows, cols, width, height):
+    """Layout of a board that fits the window together with one more column,
+    slots are not larger than in the classic layout
+
+    :return: Tuple of BoardLayout and card width and height
+    """
+    classic = classic_layout()
+    side_margin = config.cards_layout.side_margin
+    column_width = min(classic.column_width, (width - 2 * side_margin) // (cols + 1))
+    row_height = min(
+        classic.row_height,
+        (height - classic.y - config.cards_layout.top_margin) // rows,
+    )
+    card_width = int(min(column_width * 0.9, row_height * 0.8 * CARD_ASPECT))
+    card_height = int(card_width / CARD_ASPECT)
+    layout = BoardLayout(
+        (width - cols * column_width + column_width - card_width) // 2,
+        classic.y,
+        column_width,
+        row_height,
+        column_width // 2,
+    )
+    return layout, (card_width, card_height)
 
 
 class Cards:
     """Manager of all cards that are displayed on the screen
     and generated but hidden for the user
+
+    It is a view over headless game engine, which holds the rules,
+    all random choices of the game are made by ``rng``.
+    Classic deck is filtered by ``feat_switch``, variant ``rules``
+    deal the whole deck. Already dealt ``game`` is only drawn,
+    e.g. a resumed one
     """
 
-    def __init__(self, director, rows, cols, feat_switch):
+    def __init__(
+        self, director, rows, cols, feat_switch=None, rng=None, game=None, rules=None
+    ):
         self.rows = rows
         self.cols = cols
         self.d = director
 
-        self.preloaded = create_card_sprites(
-            self.d.seq, self.d.constants.scale_card_unselected
-        )
-        self.cards = select_features(self.preloaded, feat_switch)
-        self._check_cards_number(feat_switch)
-
-        self.cards_used = []
+        if game is None:
+            rng = rng if rng is not None else random.Random()
+            if rules is None:
+                cards = select_features(create_deck(), feat_switch, rng)
+                game = Game(cards, rows, cols, rng=rng)
+            else:
+                game = Game(rules.cards, rows, cols, rng=rng, rules=rules)
+        self.game = game
+        if feat_switch is not None:
+            self._check_cards_number(feat_switch)
+
+        # classic board uses spritesheet scaled in configuration,
+        # other boards are fitted to the window, ``layout_cols`` columns
+        # and one more column fit in it
+        self.layout_cols = cols
+        if game.rules is CLASSIC and (rows, cols) == (3, 4):
+            self.layout = classic_layout()
+            self.renderer = director.board_renderer
+        else:
+            self.renderer = None
+            self._fit_board()
+
+        # engine cards selected by player
         self.card_clicked = []
-
-        for i in range(self.cols):
-            self.draw_random(i * 200 + config.corner_margin.x)
+        self.outlines = director.slot_outlines
+        self.outlines.hide_all()
+        self._place_outlines()
+        self.redraw()
+        self._record_deals(range(len(self.game.board)))
 
     def _check_cards_number(self, feat_switch):
         """Assert that number of cards after feature removal is correct
         All four features should have 81 cards
         Quickstart game (one feature off) - 27 cards
         """
-        total = 81
-        for attribute in FEATURES.keys():
-            if not getattr(feat_switch, attribute):
-                total /= 3
+        rules = self.game.rules
+        removed = sum(not getattr(feat_switch, attribute) for attribute in FEATURES)
         assert (
-            len(self.cards) == total
+            len(self.game.cards) == rules.deck_size // rules.n_values**removed
         ), "Number of cards after features removal is wrong"
 
-    def __iter__(self):
-        for card in self.cards:
-            yield card
-
-    def draw_selected(self, card, x, y):
-        """Set attributes and add to batch a selected card"""
-        card.update(x, y)
-        card.batch = self.d.batch
-
-    def draw_random(self, x_offset):
-        """Draw one column of random cards
+    @property
+    def cards_used(self):
+        """Engine cards drawn on board"""
+        return [c for c in self.game.board if c is not None]
 
-        :param x_offset: x position offset of first drawn card
+    def __iter__(self):
+        return iter(self.game.cards)
+
+    def _fit_board(self):
+        """Fit variant board to the window again, with smaller cards,
+        when game dealt more columns than fit in the layout"""
+        columns = len(self.game.board) // self.rows
+        if self.renderer is not None and columns <= self.layout_cols + 1:
+            return
+        self.layout_cols = max(self.cols, columns - 1)
+        self.layout, card_size = fit_layout(
+            self.rows, self.layout_cols, self.d.width, self.d.height
+        )
+        if self.renderer is not None:
+            self.renderer.clear()
+        self.renderer = self.d.variant_renderer(self.game.rules, *card_size)
+
+    def _x_origin(self):
+        """Screen x of the first column, board is shifted left
+        when it has one more column than the layout"""
+        x = self.layout.x
+        if len(self.game.board) > self.layout_cols * self.rows:
+            x -= self.layout.new_column_shift
+        return x
+
+    def slot_xy(self, slot):
+        """Screen coordinates of the board slot"""
+        col, row = self.game.slot_position(slot)
+        x = col * self.layout.column_width + self._x_origin()
+        y = row * self.layout.row_height + self.layout.y
+        return x, y
+
+    def card_at(self, x, y):
+        """Engine card under (x, y) point or None
+
+        Board slot is computed from fixed columns and rows layout,
+        so it does not depend on number of cards on board
         """
-        cards = [c for c in self.cards if c not in self.cards_used]
-        random.shuffle(cards)
-        for i, card in enumerate(cards):
-            if i >= self.rows:
-                break
-            self.draw_selected(card, x_offset, 150 * i + config.corner_margin.y)
-            self.cards_used.append(card)
-
-    def redraw_columns(self, x_sub):
-        """Draw one column of random cards"""
-        for card in self.cards_used:
-            card.outline_delete()
-            card.update(card.x - x_sub, card.y)
-
-    def draw_single_random(self, x, y):
-        """Draw single random card at given coordinates"""
-        cards = [c for c in self.cards if c not in self.cards_used]
-        random.shuffle(cards)
-        card = cards[0]
-        self.draw_selected(card, x, y)
-        self.cards_used.append(card)
-
-    @staticmethod
-    def check_if_cards_are_set(cards_list):
-        """Detailed conditions for correct set are described in README.
-        If set consists of one or three elements then it is correct
-        according to game rules, therefore it has to be different than 2
+        col = (x - self._x_origin()) // self.layout.column_width
+        row = (y - self.layout.y) // self.layout.row_height
+        board = self.game.board
+        if not (0 <= row < self.rows and 0 <= col < len(board) // self.rows):
+            return None
+        slot = int(col) * self.rows + int(row)
+        card = board[slot]
+        if card is None:
+            return None
+        x0, y0 = self.slot_xy(slot)
+        if x0 <= x <= x0 + self.renderer.card_width and (
+            y0 <= y <= y0 + self.renderer.card_height
+        ):
+            return card
+        return None
+
+    def redraw(self):
+        """Write positions and images of all board slots to the renderer"""
+        board = self.game.board
+        self.renderer.update(board, [self.slot_xy(s) for s in range(len(board))])
+
+    def _place_outlines(self):
+        """Move selection outline of every slot to the slot position"""
+        w, h = self.renderer.card_width, self.renderer.card_height
+        for slot in range(len(self.game.board)):
+            self.outlines.place(slot, *self.slot_xy(slot), w, h)
+
+    def select(self, card):
+        """Show selection outline around card"""
+        self.outlines.show(self.game.board.index(card))
+
+    def deselect(self, card):
+        self.outlines.hide(self.game.board.index(card))
+
+    def _record_deals(self, slots):
+        """Add cards dealt to board slots to the game log"""
+        board = self.game.board
+        for slot in slots:
+            if board[slot] is not None:
+                self.d.record_event(DEAL, board[slot].id)
+
+    def _relayout(self):
+        """Fit board and place outlines again, variant board can grow after any move"""
+        self._fit_board()
+        self._place_outlines()
+
+    def add_column(self):
+        """Move cards left and draw additional fifth column"""
+        slots = self.game.add_column()
+        self._relayout()
+        self.redraw()
+        self._record_deals(slots)
+
+    def play(self, clicked):
+        """Score clicked cards, if they are a set
+        replace them with new cards from engine board
+
+        :return: True if clicked cards are a set
         """
-        assert len(cards_list) == 3, "Cards clicked length should be 3"
-        result = True
-        for attribute in FEATURES.keys():
-            set_a = {
-                getattr(cards_list[0], attribute),
-                getattr(cards_list[1], attribute),
-                getattr(cards_list[2], attribute),
-            }
-            result = result and len(set_a) != 2
-        return result
+        before = list(self.game.board)
+        if not self.game.play(clicked):
+            return False
+        for card in clicked:
+            self.outlines.hide(before.index(card))
+        if len(self.game.board) > len(before):
+            self._relayout()
+        self.redraw()
+        self._record_deals(played_slots(before, self.game.board, clicked))
+        return True
+
+    def remove_all(self):
+        """Remove all cards drawn on board"""
+        self.renderer.clear()
+        self.outlines.hide_all()
+
+    def check_if_cards_are_set(self, cards_list):
+        """Check if cards are a set under the rules of the game"""
+        return self.game.rules.is_set(cards_list)
 
     def check_if_set_exists_in_cards_used(self):
-        """Iterate through all cards drawn on screen
-        make combinations of three cards from them
-        And check if they are a set
-        """
-        result = []
-        for c in combinations(self.cards_used, 3):
-            result.append(self.check_if_cards_are_set(c))
-        return True if True in result else False
+        """Check if there is at least one set among cards drawn on screen"""
+        return not self.game.is_over()
 
     def get_two_cards_from_random_set(self):
-        list_of_sets = [
-            c
-            for c in combinations(self.cards_used, 3)
-            if self.check_if_cards_are_set(c)
-        ]
-        self.number_of_sets_left = len(list_of_sets)
-        if self.number_of_sets_left > 0:
-            random.shuffle(list_of_sets)
-            self.card_hint1 = list_of_sets[0][0]
-            self.card_hint2 = list_of_sets[0][1]
+        """Keep all but one cards of a random set in ``card_hints``,
+        two cards for classic sets of three
+
+        :return: False if there are no sets on board
+        """
+        self.number_of_sets_left = len(self.game.sets)
+        hint = self.game.hint()
+        if hint is not None:
+            self.card_hints = hint[:-1]
             return True
         return False
 
     def number_of_cards_left(self):
         """Number of cards that are not draw on the screen"""
-        num = len(self.cards) - len(self.cards_used)
-        return num if num >= 0 else 0
+        return self.game.cards_left()
 
 
-def select_features(cards, switch):
-    """Remove selected feature from total cards list
+class SlotOutlines:
+    """Selection outline of every board slot
 
-    :param cards: list if cards image sprites
-    :param switch: namedtuple with boolean features
-    :return: List of cards after removal selected feature
+    Boxes are created once, when the board is laid out for the first time,
+    then they are only moved, shown and hidden
     """
-    new_cards = [i for i in cards]
-
-    def remove_cards(attribute, features, lst):
-        if not getattr(switch, attribute):
-            single_feat = random.choice(features)
-            for card in cards:
-                if getattr(card, attribute) != single_feat:
-                    try:
-                        lst.remove(card)
-                    except ValueError:
-                        pass
-
-    for k, v in FEATURES.items():
-        remove_cards(k, v, new_cards)
 
-    return new_cards
-
-
-def create_card_sprites(seq, scale):
-    """Iterate through image sequence and create card sprites
-
-    :return: List containing all cards read from image resources
-    """
-    card_list = []
-    card_seq = iter(seq)
-    for pattern, shape, color, number in itertools.product(
-        PATTERNS, SHAPES, COLORS, NUMBERS
-    ):
-        card_sprite = Card(
-            img=card_seq.__next__(),
-            card_color=color,
-            card_shape=shape,
-            card_number=number,
-            card_pattern=pattern,
-        )
-        card_sprite.scale = scale
-        card_list.append(card_sprite)
-    return card_list
+    def __init__(self, batch=None, group=None):
+        self.batch = batch
+        self.group = group
+        self._boxes = []
+
+    def place(self, slot, x, y, width, height):
+        """Put outline of the slot around card of given size"""
+        while len(self._boxes) <= slot:
+            box = Box(
+                0,
+                0,
+                1,
+                1,
+                thickness=config.outline_box.thickness,
+                color=config.outline_box.color,
+                batch=self.batch,
+                group=self.group,
+            )
+            box.visible = False
+            self._boxes.append(box)
+        box = self._boxes[slot]
+        if box.position != (x, y):
+            box.position = (x, y)
+        box.width = width + config.outline_box.size
+        box.height = height + config.outline_box.size
+
+    def show(self, slot):
+        self._boxes[slot].visible = True
+
+    def hide(self, slot):
+        self._boxes[slot].visible = False
+
+    def hide_all(self):
+        for box in self._boxes:
+            if box.visible:
+                box.visible = False
+
+    def __len__(self):
+        return len(self._boxes)
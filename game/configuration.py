@@ -23,6 +23,18 @@ class CornerMargin:
     y: Pixel = 50
 
 
+class CardsLayout:
+    # distance between left edges of card columns and bottom edges of rows
+    column_width: Pixel = 200
+    row_height: Pixel = 150
+    # all columns are moved left by that much when fifth column is added
+    new_column_shift: Pixel = 100
+    # space for HUD above boards fitted to the window, e.g. variant boards
+    top_margin: Pixel = 100
+    # space left and right of boards fitted to the window
+    side_margin: Pixel = 50
+
+
 class OutlineBox:
     size: Pixel = 1
     thickness: Pixel = 6
@@ -42,8 +54,29 @@ class FontColor:
     rgb: RGB = (236, 240, 241)
 
 
+class GameLoop:
+    # "fixed", "event" (redraw only after input) or "vsync", see game.loop
+    mode: str = "fixed"
+    # logic ticks and frames per second in fixed mode
+    logic_hz: float = 10
+    frame_rate: float = 60
+
+
+class Variant:
+    # deck of variant mode, features 3-6 and values 3-5 with
+    # features * (values - 1) up to 12, SET_GAME_VARIANT=6x3 changes both
+    n_features: int = 5
+    n_values: int = 3
+    # board of 20 cards, one more column can be added
+    rows: int = 4
+    cols: int = 5
+
+
 class Configuration:
+    game_loop: GameLoop = GameLoop()
+    variant: Variant = Variant()
     corner_margin: CornerMargin = CornerMargin()
+    cards_layout: CardsLayout = CardsLayout()
     outline_box: OutlineBox = OutlineBox()
     font_color: FontColor = FontColor()
 
@@ -14,17 +14,23 @@ FEATURES = {
     "pattern": PATTERNS,
 }
 MENU_START_GAME_TEXT = "Start Game"
+MENU_RESUME_GAME_TEXT = "Resume Game"
 MENU_END_GAME_TEXT = "Exit"
 MENU_TEXT_FEATURES_QUICKSTART = "Quickstart: 3 features"
 MENU_TEXT_FEATURES_NORMAL = "Normal: 4 features"
+MENU_TEXT_FEATURES_VARIANT = "Variant: {} cards"
 FEATURES_QUICKSTART = "quickstart"
 FEATURES_NORMAL = "normal"
+FEATURES_VARIANT = "variant"
 END_GAME_TEXT = "End of the Game"
 RIGHT_HUD_TEXT = "Score: "
 LEFT_HUD_TEXT = "Cards left: "
 HINT_SETS_COUNT_TEXT = "I see {} sets. And you?"
 
 FeatSwitch = namedtuple("FeatSwitch", "pattern number shape color_name")
+# deck and board size of a game, variant mode is set in configuration
+VariantSpec = namedtuple("VariantSpec", "n_features n_values rows cols")
+CLASSIC_VARIANT = VariantSpec(n_features=4, n_values=3, rows=3, cols=4)
 
 
 class Constants:
@@ -37,6 +43,7 @@ HELP_TEXT = """
         Game mode:
         Quickstart - 27 cards in game (3 features)
         Normal - 81 cards in game (4 features)
+        Variant - n features with k values, set has k cards
 
         Scoring:
         +1 point if found set is valid
@@ -1,13 +1,26 @@
 from __future__ import annotations
 
+import os
+import struct
+from pathlib import Path
+
 import pyglet
 from pyglet.window import key, mouse
 
-from .constants import Constants
+from .board import BoardRenderer
+from .cards import SlotOutlines
+from .configuration import config
+from .constants import Constants, VariantSpec
+from .engine import get_rules
 from .fsm import FSM
 from .gameplay import GameEnd, GamePlay, TransitionToEnd, TransitionToGame
+from .loop import LOOP_EVENT, LoopStats
 from .menu import GameMenu, TransitionToMenu
-from .resources import read_images_from_disk
+from .profiler import Profiler, ProfilerOverlay
+from .gamelog import NO_CARD, SEED_LIMIT, GameLog
+from .resources import card_images, read_images_from_disk
+from .savegame import AutoSaver, SaveError, dump, load, save_path
+from .scene import Scene
 
 
 class GameDirector(pyglet.window.Window):
@@ -16,24 +29,66 @@ class GameDirector(pyglet.window.Window):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.set_location(50, 50)  # location of upper left window corner
-        self.frame_rate = 0.1
+        # set by game.loop.run
+        self.loop_mode = None
+        self.loop_stats = LoopStats()
+        self.interpolation = 0.0
+        self._redraw_scheduled = False
         self.batch = pyglet.graphics.Batch()
         self.background = pyglet.graphics.Group(order=0)
         self.foreground = pyglet.graphics.Group(order=1)
 
-        cursor = self.get_system_mouse_cursor(self.CURSOR_DEFAULT)
-        self.set_mouse_cursor(cursor)
-
-        self.first_run = [True] * 2
-        self.new_column_used = False
+        self.cursor_default = self.get_system_mouse_cursor(self.CURSOR_DEFAULT)
+        self.cursor_hand = self.get_system_mouse_cursor(self.CURSOR_HAND)
+        self.set_mouse_cursor(self.cursor_default)
+
+        # labels and shapes of menu and game screens, cards are not in scenes
+        self.scenes = {"MENU": Scene("MENU", order=2), "GAME": Scene("GAME", order=3)}
+        self.cards = None
+
+        # deck and board of variant mode, SET_GAME_VARIANT=6x3 sets deck
+        variant = os.environ.get("SET_GAME_VARIANT")
+        n_features, n_values = (
+            map(int, variant.split("x"))
+            if variant
+            else (config.variant.n_features, config.variant.n_values)
+        )
+        get_rules(n_features, n_values)  # unsupported deck fails at start
+        self.variant = VariantSpec(
+            n_features, n_values, config.variant.rows, config.variant.cols
+        )
+
+        # seed of the next game, random when None
+        seed = os.environ.get("SET_GAME_SEED")
+        self.seed = int(seed) if seed else None
+        if self.seed is not None and not 0 <= self.seed < SEED_LIMIT:
+            raise ValueError(f"SET_GAME_SEED must be from 0 to {SEED_LIMIT - 1}")
+        # log of the current game, saved to SET_GAME_RECORD directory
+        self.game_log = None
+        record_dir = os.environ.get("SET_GAME_RECORD")
+        self.record_dir = Path(record_dir) if record_dir else None
+
+        # snapshot of the game in progress is saved after every move,
+        # saved_game is offered in menu and resume_snapshot is the one to continue
+        self.autosaver = AutoSaver(save_path())
+        self.saved_game = None
+        self.resume_snapshot = None
 
         card_scale = 0.8
         self.constants = Constants(card_scale=card_scale)
 
-        self.seq = read_images_from_disk()
-
-        self.keys = key.KeyStateHandler()
-        self.push_handlers(self.keys)
+        self.seq = read_images_from_disk(card_scale)
+        # all board cards are drawn by one vertex list that lives as long
+        # as the window, spritesheet texture can be already scaled
+        self.board_renderer = BoardRenderer(
+            self.seq,
+            self.constants.scale_card_unselected / self.seq.scale,
+            self.batch,
+            self.background,
+        )
+        # renderers of other decks and card sizes, created on first use
+        self._variant_renderers = {}
+        self.slot_outlines = SlotOutlines(self.batch, self.foreground)
 
         # Set GAME Finite State Machine states and transitions
         self.fsm = FSM()
@@ -46,31 +101,87 @@ class GameDirector(pyglet.window.Window):
 
         self.fsm.transition("toMENU")
 
+        # profiler of the whole run, paused by F3, so its trace file has
+        # every profiled part of the game; ``profiler`` is None when paused
+        self._profiler = None
+        self.profiler = None
+        self.profiler_overlay = None
+        if os.environ.get("SET_GAME_PROFILE"):
+            self.toggle_profiler()
+
     def delete_all_objects(self):
-        """Remove all visible sprite cards and text labels from screen"""
-        if self.first_run:
-            self.first_run.pop()
-            return
-        if len(self.cards.cards_used) > 0:
-            for c in self.cards.cards_used:
-                c.outline_delete()
-                c.delete()
-            self.cards.cards_used = []
-        self.score.delete()
-        self.cards_number_display.delete()
-        try:
-            self.text_end_game.delete()
-        except AttributeError:
-            pass
+        """Remove all cards and text labels from screen"""
+        if self.cards is not None:
+            self.cards.remove_all()
+        for scene in self.scenes.values():
+            scene.clear()
+
+    def variant_renderer(self, rules, card_width, card_height):
+        """Board renderer of the rules deck with cards of given size"""
+        key = (rules.n_features, rules.n_values, card_width, card_height)
+        renderer = self._variant_renderers.get(key)
+        if renderer is None:
+            images, scale = card_images(rules, card_width, card_height)
+            renderer = self._variant_renderers[key] = BoardRenderer(
+                images, scale, self.batch, self.background
+            )
+        return renderer
+
+    def start_game_log(self, seed, mode, variant):
+        self.save_game_log()
+        self.game_log = GameLog(seed, mode, variant)
+
+    def record_event(self, kind, card_id=NO_CARD):
+        """Add player action or deal to the game log, resumed games have no log"""
+        if self.game_log is not None:
+            self.game_log.record(kind, card_id)
+
+    def save_game_log(self):
+        """Save log of finished game, if recording is enabled"""
+        if self.game_log is not None and self.record_dir is not None:
+            try:
+                self.game_log.save(self.record_dir / self.game_log.file_name())
+            except (OSError, struct.error) as e:
+                print(f"Game log was not saved: {e}")
+        self.game_log = None
+
+    def autosave(self):
+        """Save snapshot of the current game in background"""
+        self.autosaver.save(dump(self.cards.game, self.set_feature))
+
+    def load_autosave(self):
+        """Last autosaved game or None"""
+        if self.autosaver.data is None:
+            return None
         try:
-            self.cards_number_display_hint.delete()
-        except AttributeError:
-            pass
-        self.logo.delete()
-        # TODO: global objects aggregator then loop over it would be better
-        # group ?
-        self.menu_box.delete()
-        self.menu_btn.delete()
+            return load(self.autosaver.data)
+        except SaveError:
+            return None
+
+    def toggle_profiler(self):
+        """Turn on or off timing of states and drawing with HUD overlay"""
+        if self.profiler is None:
+            if self._profiler is None:
+                self._profiler = Profiler(trace_path=os.environ.get("SET_GAME_TRACE"))
+            self.profiler = self._profiler
+            self.profiler_overlay = ProfilerOverlay(self, self.profiler)
+        else:
+            self.profiler_overlay.delete()
+            self.profiler = None
+            self.profiler_overlay = None
+        self.fsm.profiler = self.profiler
+        self.request_redraw()
+
+    def request_redraw(self):
+        """Draw window soon, needed only in event loop mode,
+        other modes draw every frame anyway"""
+        if self.loop_mode == LOOP_EVENT and not self._redraw_scheduled:
+            self._redraw_scheduled = True
+            pyglet.clock.schedule_once(self._redraw, 0)
+
+    def _redraw(self, dt):
+        self._redraw_scheduled = False
+        self.draw(dt)
 
     @staticmethod
     def is_in_the_box(box, x, y):
@@ -78,29 +189,53 @@ class GameDirector(pyglet.window.Window):
             return True
 
     def on_mouse_press(self, x, y, button, modifiers):
-        """Global mouse press"""
-        if button == mouse.LEFT and self.fsm.cur_state == self.fsm.states["GAME"]:
-            self.fsm.states["GAME"].on_mouse_press(x, y, button, modifiers)
-        elif button == mouse.LEFT and self.fsm.cur_state == self.fsm.states["END"]:
-            self.fsm.states["END"].on_mouse_press(x, y, button, modifiers)
-        elif button == mouse.LEFT and self.fsm.cur_state == self.fsm.states["MENU"]:
-            self.fsm.states["MENU"].on_mouse_press(x, y, button, modifiers)
+        """Global mouse press, passed to current state"""
+        if button == mouse.LEFT:
+            if self.fsm.dispatch("on_mouse_press", x, y, button, modifiers):
+                self.request_redraw()
 
     def on_mouse_motion(self, x, y, dx, dy):
-        """Global mouse motion"""
-        if self.fsm.cur_state == self.fsm.states["GAME"]:
-            self.fsm.states["GAME"].on_mouse_motion(x, y)
-        elif self.fsm.cur_state == self.fsm.states["MENU"]:
-            self.fsm.states["MENU"].on_mouse_motion(x, y)
+        """Global mouse motion, passed to current state"""
+        if self.fsm.dispatch("on_mouse_motion", x, y):
+            self.request_redraw()
 
     def on_key_press(self, symbol, modifiers):
-        """Global key shortcuts"""
+        """Global key shortcuts, other keys are passed to current state"""
         if symbol == key.ESCAPE:
-            pyglet.app.exit()
+            self.shutdown()
+        elif symbol == key.F3:
+            self.toggle_profiler()
+        elif self.fsm.dispatch("on_key_press", symbol, modifiers):
+            self.request_redraw()
+
+    def on_expose(self):
+        self.request_redraw()
 
     def on_draw(self):
+        self.loop_stats.frame()
         self.clear()
-        self.batch.draw()
+        if self.profiler is None:
+            self.batch.draw()
+        else:
+            with self.profiler.measure("batch.draw"):
+                self.batch.draw()
+            if self.profiler_overlay is not None:
+                self.profiler_overlay.draw()
+
+    def shutdown(self):
+        """Save log and pending snapshot of the current game, finish trace
+        file and stop the application, every way to quit the game ends here"""
+        self.save_game_log()
+        self.autosaver.close()
+        if self._profiler is not None:
+            self._profiler.close()
+        pyglet.app.exit()
+
+    def on_close(self):
+        self.shutdown()
+        super().on_close()
 
     def update(self, dt):
-        self.fsm.execute()
+        """Logic tick, state is executed only if it is dirty"""
+        self.loop_stats.tick()
+        self.fsm.dispatch("on_timer", dt)
@@ -0,0 +1,537 @@
+"""Game rules without any pyglet dependency
+
+Deck, board, set detection and scoring are kept here, so that a game
+can be played without OpenGL context, e.g. in simulations or benchmarks.
+Classic deck has 4 features with 3 values, variant decks are described
+by Rules with n features of k values.
+"""
+from __future__ import annotations
+
+import itertools
+import random
+from functools import lru_cache
+from operator import attrgetter
+
+from .constants import (
+    CLASSIC_VARIANT,
+    COLORS,
+    FEATURES,
+    FEATURES_QUICKSTART,
+    FEATURES_VARIANT,
+    NUMBERS,
+    PATTERNS,
+    SHAPES,
+    FeatSwitch,
+)
+
+class _InternedCard:
+    """Immutable card, attributes are given in order of ``__slots__``
+
+    There is only one instance for every card id of a deck,
+    so cards can be compared and hashed by identity.
+    ``deck`` is (features, values) of the deck in get_rules
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        # unpickled card is the same instance from its deck
+        return deck_card, (*self.deck, self.id)
+
+
+class CardModel(_InternedCard):
+    """Immutable rule data of a single card of the classic deck, from CARDS"""
+
+    __slots__ = ("id", "pattern", "shape", "color_name", "number")
+    deck = (4, 3)
+
+    def __repr__(self):
+        return (
+            f"CardModel({self.id}, {self.pattern}, {self.shape}, "
+            f"{self.color_name}, {self.number})"
+        )
+
+
+# all cards in the same order as images in spritesheet, card id is a base-3
+# number, its digits are indexes of pattern, shape, color and number
+# - from the most significant
+CARDS = tuple(
+    CardModel(card_id, pattern, shape, color, number)
+    for card_id, (pattern, shape, color, number) in enumerate(
+        itertools.product(PATTERNS, SHAPES, COLORS, NUMBERS)
+    )
+)
+
+
+def cards_mask(cards):
+    """Bitmask with bit ``1 << card.id`` set for every card"""
+    mask = 0
+    for card in cards:
+        mask |= 1 << card.id
+    return mask
+
+
+def iter_bits(mask):
+    """Card ids of bits set in mask, from the lowest"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+ALL_CARDS_MASK = cards_mask(CARDS)
+
+# FEATURE_MASKS[attribute][value] has bits of all cards with that feature value
+FEATURE_MASKS = {
+    attribute: {
+        value: cards_mask(c for c in CARDS if getattr(c, attribute) == value)
+        for value in values
+    }
+    for attribute, values in FEATURES.items()
+}
+
+
+class VariantCard(_InternedCard):
+    """Immutable card of a variant deck from ``Rules.cards``,
+    ``values`` are its feature values"""
+
+    __slots__ = ("id", "values", "n_values")
+
+    @property
+    def deck(self):
+        return len(self.values), self.n_values
+
+    def __repr__(self):
+        return f"VariantCard({self.id}, {self.values})"
+
+
+def deck_card(n_features, n_values, card_id):
+    """Card of the deck with given id, used to unpickle cards"""
+    return get_rules(n_features, n_values).cards[card_id]
+
+
+class Rules:
+    """Deck of cards with n features of k values each
+
+    Card id is a base-k number of feature values, the first feature
+    is the most significant digit. A set is k cards on which every feature
+    is either the same on all cards or different on each of them,
+    for three values it is the mod 3 sum rule of the classic game.
+
+    Sets are found from k - 1 cards, because the last card of a set
+    is fully determined by the others. Use get_rules to share instances.
+    """
+
+    MIN_FEATURES, MAX_FEATURES = 3, 6
+    MIN_VALUES, MAX_VALUES = 3, 5
+    # limit of n_features * (n_values - 1), larger decks like 5x4 or 4x5
+    # need boards of 60 and more cards to have a set, 6x3, 4x4 and 3x5
+    # stay at about 40 cards
+    MAX_DECK_COMPLEXITY = 12
+
+    def __init__(self, n_features=4, n_values=3, cards=None):
+        if not self.MIN_FEATURES <= n_features <= self.MAX_FEATURES:
+            raise ValueError(f"Unsupported number of features: {n_features}")
+        if not self.MIN_VALUES <= n_values <= self.MAX_VALUES:
+            raise ValueError(f"Unsupported number of values: {n_values}")
+        if n_features * (n_values - 1) > self.MAX_DECK_COMPLEXITY:
+            raise ValueError(
+                f"Unsupported deck of {n_features} features with {n_values} values,"
+                f" boards would be too large"
+            )
+        self.n_features = n_features
+        self.n_values = n_values
+        self.set_size = n_values
+        self.deck_size = n_values**n_features
+        self._powers = tuple(n_values**i for i in reversed(range(n_features)))
+        # feature values of every card id
+        self.values = [
+            tuple(card_id // power % n_values for power in self._powers)
+            for card_id in range(self.deck_size)
+        ]
+        # classic game ends when there is no set on board,
+        # in variant decks many boards have no set, so more cards are dealt
+        self.deal_until_set = cards is None
+        if cards is None:
+            cards = tuple(
+                VariantCard(card_id, values, n_values)
+                for card_id, values in enumerate(self.values)
+            )
+        self.cards = cards
+        # rows of third card table, built for cards as they are dealt
+        self._third_rows = {}
+
+    def third_row(self, card_id):
+        """Ids of cards completing a set of three with the card and every card id
+
+        Only for decks with three values, each feature of the third card
+        is minus sum of the other two modulo 3
+        """
+        row = self._third_rows.get(card_id)
+        if row is None:
+            row = [0]
+            for value in self.values[card_id]:
+                row = [r * 3 + (-value - v) % 3 for r in row for v in range(3)]
+            self._third_rows[card_id] = row
+        return row
+
+    def _last_card_id(self, masks):
+        """Id of the card completing set_size - 1 cards with given feature masks
+
+        Mask of a feature has bit ``1 << value`` set for every value on the cards,
+        all cards have the same value or all values except one are used
+        """
+        full = (1 << self.n_values) - 1
+        card_id = 0
+        for power, mask in zip(self._powers, masks):
+            if mask.bit_count() != 1:
+                mask ^= full
+            card_id += (mask.bit_length() - 1) * power
+        return card_id
+
+    def _masks(self, cards):
+        masks = [0] * self.n_features
+        for card in cards:
+            for feature, value in enumerate(self.values[card.id]):
+                masks[feature] |= 1 << value
+        return masks
+
+    def complete(self, cards):
+        """Id of the only card that makes a set with set_size - 1 cards,
+        None when the cards can not be part of one set"""
+        assert len(cards) == self.set_size - 1, "Wrong number of cards"
+        masks = self._masks(cards)
+        if any(m.bit_count() not in (1, len(cards)) for m in masks):
+            return None
+        return self._last_card_id(masks)
+
+    def is_set(self, cards):
+        if len(cards) != self.set_size:
+            return False
+        if self.set_size == 3:
+            a, b, c = cards
+            return self.third_row(a.id)[b.id] == c.id
+        return self.complete(cards[:-1]) == cards[-1].id
+
+    def sets_with(self, card, on_board):
+        """Sets made by card with other cards on board
+
+        :param on_board: dict card id -> card, without the card
+        :return: List of sets, each as a tuple of cards with the card last
+        """
+        result = []
+        if self.set_size == 3:
+            row = self.third_row(card.id)
+            for other in on_board.values():
+                third = on_board.get(row[other.id])
+                if third is not None and other.id < third.id:
+                    result.append((other, third, card))
+            return result
+
+        # cards are chosen in id order and a subset is dropped as soon as
+        # some feature is neither all the same nor all different on it
+        others = sorted(on_board.values(), key=attrgetter("id"))
+        values = self.values
+        depth = self.set_size - 2
+
+        def search(start, chosen, masks):
+            if len(chosen) == depth:
+                last = on_board.get(self._last_card_id(masks))
+                if last is not None and last.id > chosen[-1].id:
+                    result.append((*chosen, last, card))
+                return
+            count = len(chosen) + 2
+            for i in range(start, len(others)):
+                other = others[i]
+                new = [m | 1 << v for m, v in zip(masks, values[other.id])]
+                if all(m.bit_count() in (1, count) for m in new):
+                    search(i + 1, (*chosen, other), new)
+
+        search(0, (), [1 << v for v in values[card.id]])
+        return result
+
+    def find_sets(self, cards):
+        """Find all sets among given cards
+
+        :return: List of sets, each as a tuple of cards
+        """
+        on_board = {}
+        result = []
+        for card in cards:
+            result.extend(self.sets_with(card, on_board))
+            on_board[card.id] = card
+        return result
+
+
+# rules of the classic game with interned classic cards
+CLASSIC = Rules(4, 3, cards=CARDS)
+
+
+@lru_cache(maxsize=None)
+def get_rules(n_features, n_values):
+    """Shared rules of deck with n features of k values"""
+    if (n_features, n_values) == (4, 3):
+        return CLASSIC
+    return Rules(n_features, n_values)
+
+
+def create_deck():
+    """Create all cards in the same order as images in spritesheet
+
+    :return: List of 81 cards
+    """
+    return list(CARDS)
+
+
+def check_if_cards_are_set(cards_list):
+    """Detailed conditions for correct set are described in README,
+    classic cards only, other decks use is_set of their rules"""
+    return CLASSIC.is_set(cards_list)
+
+
+def find_sets(cards):
+    """Find all sets among given classic cards
+
+    :return: List of sets, each as a tuple of three cards
+    """
+    return CLASSIC.find_sets(cards)
+
+
+def create_feat_switch(set_feature, rng=random):
+    """Randomly select features for the game mode
+    quickstart game (one feature is False) - 27 cards in game
+    normal game - 81 cards in game
+    """
+    features = 4 * [True]
+    if set_feature == FEATURES_QUICKSTART:
+        features[rng.randint(0, 3)] = False
+    return FeatSwitch(*features)
+
+
+def select_features(cards, switch, rng=random):
+    """Remove selected feature from total cards list
+
+    Every feature that is switched off gets a single random value,
+    cards are kept when their bit is set in masks of all chosen values
+
+    :param cards: list of cards
+    :param switch: namedtuple with boolean features
+    :param rng: random generator choosing value of removed feature
+    :return: List of cards after removal selected feature
+    """
+    keep = ALL_CARDS_MASK
+    for attribute, values in FEATURES.items():
+        if not getattr(switch, attribute):
+            keep &= FEATURE_MASKS[attribute][rng.choice(values)]
+    return [card for card in cards if keep >> card.id & 1]
+
+
+class Game:
+    """Single game played with given cards
+
+    Board is a list of slots filled column by column,
+    slot index is ``col * rows + row`` and empty slot is None.
+    Cards are dealt from the draw pile, which is shuffled once
+    with the game random generator, so a seed reproduces the deal.
+    ``rules`` decide which cards make a set, classic by default.
+    """
+
+    def __init__(self, cards, rows=3, cols=4, rng=None, rules=CLASSIC):
+        self.rules = rules
+        self.rows = rows
+        self.cols = cols
+        self.rng = rng if rng is not None else random.Random()
+        self.cards = list(cards)
+        # cards are drawn from the end of the pile
+        self.deck = list(self.cards)
+        self.rng.shuffle(self.deck)
+        self.board = []
+        self.on_board = {}  # card id -> card
+        # bit ``1 << card.id`` is set for every card in draw pile,
+        # on board and already played, together they are all cards of the game
+        self.deck_mask = cards_mask(self.deck)
+        self.board_mask = 0
+        self.used_mask = 0
+        # live index of valid sets on board,
+        # updated only when a card is put on or taken from board
+        self.sets = []
+        self.score = 0
+        self.new_column_used = False
+        # hint stays the same until cards on board change
+        self._hint = None
+        self._hint_mask = None
+
+        for _ in range(self.cols):
+            self.deal_column()
+        self.deal_until_set()
+
+    @classmethod
+    def from_state(
+        cls,
+        cards,
+        deck,
+        board,
+        rows,
+        cols,
+        score=0,
+        new_column_used=False,
+        rng=None,
+        rules=CLASSIC,
+    ):
+        """Continue saved game, cards are put in their board slots without dealing
+
+        :param deck: draw pile, next card is the last one
+        :param board: cards in board slots, None for empty slot
+        """
+        game = cls([], rows, 0, rng, rules)
+        game.cols = cols
+        game.cards = list(cards)
+        game.deck = list(deck)
+        game.deck_mask = cards_mask(game.deck)
+        game.board = [None] * len(board)
+        for slot, card in enumerate(board):
+            if card is not None:
+                game._put(slot, card)
+        game.used_mask = cards_mask(game.cards) & ~game.deck_mask & ~game.board_mask
+        game.score = score
+        game.new_column_used = new_column_used
+        return game
+
+    def cards_on_board(self):
+        return [c for c in self.board if c is not None]
+
+    def cards_left(self):
+        """Number of cards that are not dealt on board"""
+        return self.deck_mask.bit_count()
+
+    def slot_position(self, slot):
+        """Column and row of the board slot"""
+        return divmod(slot, self.rows)
+
+    def _put(self, slot, card):
+        """Put card on board and index every set it makes with other cards"""
+        self.sets.extend(self.rules.sets_with(card, self.on_board))
+        self.board[slot] = card
+        self.on_board[card.id] = card
+        self.board_mask |= 1 << card.id
+
+    def _take(self, slot):
+        """Take card from board, drop all sets it was part of"""
+        card = self.board[slot]
+        self.board[slot] = None
+        del self.on_board[card.id]
+        self.board_mask &= ~(1 << card.id)
+        self.used_mask |= 1 << card.id
+        self.sets = [s for s in self.sets if card not in s]
+
+    def deal_column(self):
+        """Add one column of slots filled with cards from draw pile
+
+        :return: List of filled slots
+        """
+        slots = []
+        for _ in range(self.rows):
+            slot = len(self.board)
+            self.board.append(None)
+            if self.deck:
+                self.deal_single(slot)
+                slots.append(slot)
+        return slots
+
+    def deal_single(self, slot):
+        """Put card from draw pile in empty slot"""
+        card = self.deck.pop()
+        self.deck_mask &= ~(1 << card.id)
+        self._put(slot, card)
+
+    def add_column(self):
+        """Add fifth column of cards, it can be done only once in a game
+
+        :return: List of filled slots
+        """
+        if self.new_column_used:
+            return []
+        self.new_column_used = True
+        return self.deal_column() + self.deal_until_set()
+
+    def deal_until_set(self):
+        """Deal cards one by one while there is no set on board, if rules say so
+
+        Cards are put in empty slots first, then in one more column
+
+        :return: List of filled slots
+        """
+        slots = []
+        if not self.rules.deal_until_set:
+            return slots
+        while not self.sets and self.deck:
+            if None not in self.board:
+                self.board.extend([None] * self.rows)
+            slot = self.board.index(None)
+            self.deal_single(slot)
+            slots.append(slot)
+        return slots
+
+    def play(self, cards):
+        """Score cards selected by player, if they are a set
+        then take them from board and deal new ones in their place
+
+        :return: True if cards are a set
+        """
+        if not self.rules.is_set(cards):
+            self.score = self.score - 1 if self.score > 0 else 0
+            return False
+        self.score += 1
+
+        # reset board to 12 cards if 15 were in the game
+        add_new_cards = len(self.on_board) <= self.rows * self.cols
+
+        for card in cards:
+            slot = self.board.index(card)
+            self._take(slot)
+            if self.cards_left() > 0 and add_new_cards:
+                self.deal_single(slot)
+        self.deal_until_set()
+        return True
+
+    def hint(self):
+        """Random set from board or None if there are no sets
+
+        The set is chosen once for every board state, so asking again
+        shows the same hint and does not use the random generator
+        """
+        if self._hint_mask != self.board_mask:
+            self._hint = self.rng.choice(self.sets) if self.sets else None
+            self._hint_mask = self.board_mask
+        return self._hint
+
+    def is_over(self):
+        """Game ends when there are no sets left on board,
+        in variant rules only after the draw pile is empty"""
+        return len(self.sets) == 0
+
+
+def new_game(seed, mode, variant=CLASSIC_VARIANT):
+    """Deal the game of seed and mode, the same deal in the game window,
+    simulations and replays
+
+    :param mode: FEATURES_QUICKSTART, FEATURES_NORMAL or FEATURES_VARIANT
+    :param variant: VariantSpec of deck and board of variant mode
+    :return: Game with the seeded random generator
+    """
+    rng = random.Random(seed)
+    if mode == FEATURES_VARIANT:
+        rules = get_rules(variant.n_features, variant.n_values)
+        return Game(rules.cards, variant.rows, variant.cols, rng=rng, rules=rules)
+    cards = select_features(create_deck(), create_feat_switch(mode, rng), rng)
+    return Game(cards, rng=rng)
@@ -0,0 +1,168 @@
+"""Card faces drawn procedurally for variant decks without a spritesheet
+
+Feature values are drawn in the order of card id digits:
+
+    color of symbols, shape of symbols, number of symbols, fill pattern,
+    background tint (5th feature), border color (6th feature)
+
+Faces are rasterized row by row into RGBA bytes, so no numpy is needed,
+and only cards that are dealt are drawn, into cells of one texture.
+"""
+from __future__ import annotations
+
+import math
+from collections import OrderedDict
+
+import pyglet
+
+COLORS = [
+    (231, 76, 60),
+    (142, 68, 173),
+    (39, 174, 96),
+    (41, 128, 185),
+    (230, 126, 34),
+]
+TINTS = [
+    (255, 255, 255),
+    (253, 246, 227),
+    (232, 244, 252),
+    (252, 234, 238),
+    (234, 250, 241),
+]
+BORDERS = [
+    (189, 195, 199),
+    (44, 62, 80),
+    (241, 196, 15),
+    (22, 160, 133),
+    (160, 82, 45),
+]
+
+# half width of symbol at height t from -1 (bottom) to 1 (top), 1 is full width
+SHAPES = [
+    lambda t: math.sqrt(max(0.0, 1 - t * t)),  # oval
+    lambda t: 1 - abs(t),  # diamond
+    lambda t: 1.0,  # rectangle
+    lambda t: (1 - t) / 2,  # triangle
+    lambda t: max(abs(t), 0.3),  # hourglass
+]
+
+OUTLINED, STRIPED, SOLID, HALF, COLUMNS = range(5)
+BORDER_SIZE = 3
+OUTLINE_SIZE = 2
+# values of features the deck does not have, symbols of 3 feature deck are solid
+_DEFAULT_VALUES = [0, 0, 0, SOLID, 0, 0]
+
+
+def _fill(pattern, y, mid):
+    """Is interior of the symbol row filled with symbol color"""
+    if pattern == STRIPED:
+        return y // 2 % 2 == 0
+    if pattern == HALF:
+        return y < mid
+    return pattern == SOLID
+
+
+def draw_face(values, width, height):
+    """RGBA pixels of the card with given feature values, bottom row first"""
+    values = list(values) + _DEFAULT_VALUES[len(values) :]
+    color, shape, number, pattern, tint, border = values
+    color = bytes(COLORS[color] + (255,))
+    background = bytes(TINTS[tint] + (255,))
+    half = SHAPES[shape]
+
+    pixels = bytearray(bytes(BORDERS[border] + (255,)) * (width * height))
+    inner = background * (width - 2 * BORDER_SIZE)
+    for y in range(BORDER_SIZE, height - BORDER_SIZE):
+        start = (y * width + BORDER_SIZE) * 4
+        pixels[start : start + len(inner)] = inner
+
+    count = number + 1
+    symbol_height = int(height * 0.62)
+    step = min(int(symbol_height * 0.6), (width - 4 * BORDER_SIZE) // 5)
+    symbol_width = step - 4
+    left = (width - count * step) // 2 + 2
+    bottom = (height - symbol_height) // 2
+    radius = symbol_height / 2
+    inner_radius = radius - OUTLINE_SIZE
+    # vertical stripes of COLUMNS pattern, sliced at symbol position
+    columns = (color * 2 + background * 2) * (width // 4 + 1)
+
+    for row in range(symbol_height):
+        y = bottom + row
+        t = (row + 0.5 - radius) / radius
+        outer = round(half(t) * symbol_width / 2)
+        if outer <= 0:
+            continue
+        t_inner = (row + 0.5 - radius) / inner_radius
+        interior = 0
+        if abs(t_inner) < 1:
+            interior = round(half(t_inner) * (symbol_width / 2 - OUTLINE_SIZE))
+            interior = max(0, interior)
+        filled = _fill(pattern, row, radius)
+        for i in range(count):
+            center = left + i * step + symbol_width // 2
+            x0, x1 = center - outer, center + outer
+            offset = (y * width + x0) * 4
+            pixels[offset : offset + (x1 - x0) * 4] = color * (x1 - x0)
+            if interior and not filled:
+                x0, x1 = center - interior, center + interior
+                offset = (y * width + x0) * 4
+                size = (x1 - x0) * 4
+                if pattern == COLUMNS:
+                    pixels[offset : offset + size] = columns[x0 % 4 * 4 :][:size]
+                else:
+                    pixels[offset : offset + size] = background * (x1 - x0)
+    return bytes(pixels)
+
+
+class CardFaces:
+    """Sequence of procedural card images of variant rules
+
+    Faces are drawn when a card is used for the first time, into a cell
+    of a texture with ``capacity`` cells. When all cells are taken, the cell
+    of the least recently used card is reused, so capacity has to be
+    larger than the biggest board. Same interface as resources.CardImages
+    """
+
+    def __init__(self, rules, width, height, capacity=64, columns=8):
+        self.rules = rules
+        self.scale = 1.0
+        self.item_width = width
+        self.item_height = height
+        self.capacity = capacity
+        self.columns = columns
+        rows = -(-capacity // columns)
+        self.texture = pyglet.image.Texture.create(columns * width, rows * height)
+        self._regions = [
+            self.texture.get_region(
+                cell % columns * width, cell // columns * height, width, height
+            )
+            for cell in range(capacity)
+        ]
+        self._cells = OrderedDict()  # card id -> cell, least recently used first
+
+    def __len__(self):
+        return self.rules.deck_size
+
+    def __getitem__(self, card_id):
+        if not 0 <= card_id < len(self):
+            raise IndexError(f"Card image index out of range: {card_id}")
+        cell = self._cells.get(card_id)
+        if cell is not None:
+            self._cells.move_to_end(card_id)
+            return self._regions[cell]
+
+        if len(self._cells) < self.capacity:
+            cell = len(self._cells)
+        else:
+            _, cell = self._cells.popitem(last=False)
+        self._cells[card_id] = cell
+        region = self._regions[cell]
+        face = pyglet.image.ImageData(
+            self.item_width,
+            self.item_height,
+            "RGBA",
+            draw_face(self.rules.values[card_id], self.item_width, self.item_height),
+        )
+        self.texture.blit_into(face, region.x, region.y, 0)
+        return region
@@ -0,0 +1,19 @@
+"""Writing of game files without any pyglet dependency"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+
+def atomic_write(path, data):
+    """Write bytes to a temporary file next to path and replace path with it,
+    so the file is never left half written, e.g. when the game is killed
+
+    Parent directory is created when it does not exist
+    """
+    path = Path(path)
+    tmp = path.with_suffix(".tmp")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
@@ -2,9 +2,26 @@ from __future__ import annotations
 
 
 class State:
+    """Base state, event handlers are called only for the current state"""
+
     def __init__(self, director):
         self.d = director
 
+    def execute(self):
+        """Work done after an event marked state machine as dirty"""
+
+    def on_key_press(self, symbol, modifiers):
+        pass
+
+    def on_mouse_press(self, x, y, button, modifiers):
+        pass
+
+    def on_mouse_motion(self, x, y):
+        pass
+
+    def on_timer(self, dt):
+        pass
+
 
 class FSM:
     def __init__(self):
@@ -12,16 +29,46 @@ class FSM:
         self.transitions = {}
         self.cur_state = None
         self.trans = None
+        # current state is executed only when something has changed
+        self.dirty = True
+        # game.profiler.Profiler when timing is enabled
+        self.profiler = None
 
     def set_state(self, state_name):
         self.cur_state = self.states[state_name]
 
     def transition(self, trans_name):
         self.trans = self.transitions[trans_name]
+        self.dirty = True
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def _run(self, obj, method, *args):
+        """Call state method, timed when profiler is enabled"""
+        func = getattr(obj, method)
+        if self.profiler is None:
+            return func(*args)
+        with self.profiler.measure(f"{type(obj).__name__}.{method}"):
+            return func(*args)
+
+    def dispatch(self, event, *args):
+        """Pass event to current state handler and react to it immediately
+
+        :return: True if the handler marked state machine as dirty,
+            so the window has to be redrawn
+        """
+        if self.cur_state is not None:
+            self._run(self.cur_state, event, *args)
+        changed = self.dirty
+        self.execute()
+        return changed
 
     def execute(self):
-        if self.trans:
-            self.trans.execute()
-            self.set_state(self.trans.to_state)
-            self.trans = None
-        self.cur_state.execute()
+        while self.dirty:
+            self.dirty = False
+            if self.trans:
+                self._run(self.trans, "execute")
+                self.set_state(self.trans.to_state)
+                self.trans = None
+            self._run(self.cur_state, "execute")
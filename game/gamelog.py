@@ -0,0 +1,167 @@
+"""Compact binary log of a single game, which can be played again headlessly
+
+Game is fully defined by its seed, mode and deck, the log keeps only player
+actions and dealt cards, the latter to check that replay did not diverge.
+File is a header followed by fixed size events:
+
+    header: magic, seed, mode index, features, values, rows, columns
+    event:  kind, milliseconds since game start, card id
+
+Log is played again with the engine only by ``replay_game``, without
+window or OpenGL, game.replay plays it in the game window.
+"""
+from __future__ import annotations
+
+import struct
+import time
+from collections import namedtuple
+
+from .constants import (
+    CLASSIC_VARIANT,
+    FEATURES_NORMAL,
+    FEATURES_QUICKSTART,
+    FEATURES_VARIANT,
+    VariantSpec,
+)
+from .engine import get_rules, new_game
+from .files import atomic_write
+
+MODES = [FEATURES_NORMAL, FEATURES_QUICKSTART, FEATURES_VARIANT]
+
+_HEADER = struct.Struct("<4sQBBBBB")
+_EVENT = struct.Struct("<BIH")
+_MAGIC = b"SGR2"
+
+DEAL, CLICK, HINT_TEXT, HINT_CARDS, ADD_COLUMN = range(5)
+NO_CARD = 0xFFFF
+# seeds are stored as unsigned 64-bit numbers in the header
+SEED_LIMIT = 2**64
+
+Event = namedtuple("Event", "kind ms card_id")
+
+
+class ReplayError(Exception):
+    pass
+
+
+class GameLog:
+    """Events of a single game, recorded or loaded from file
+
+    ``variant`` is VariantSpec of the game deck and board
+    """
+
+    def __init__(self, seed, mode, variant=CLASSIC_VARIANT, events=None):
+        self.seed = seed
+        self.mode = mode
+        self.variant = variant
+        self.events = events if events is not None else []
+        self._start = time.perf_counter()
+
+    def record(self, kind, card_id=NO_CARD):
+        ms = int((time.perf_counter() - self._start) * 1000)
+        self.events.append(Event(kind, ms, card_id))
+
+    def actions(self):
+        """Events without timing, equal for a game and its replay"""
+        return [(e.kind, e.card_id) for e in self.events]
+
+    def to_bytes(self):
+        header = _HEADER.pack(_MAGIC, self.seed, MODES.index(self.mode), *self.variant)
+        return header + b"".join(_EVENT.pack(*e) for e in self.events)
+
+    @classmethod
+    def from_bytes(cls, data):
+        try:
+            magic, seed, mode, *variant = _HEADER.unpack_from(data)
+        except struct.error:
+            raise ReplayError("Game log is too short") from None
+        body = memoryview(data)[_HEADER.size :]
+        if magic != _MAGIC or mode >= len(MODES) or len(body) % _EVENT.size:
+            raise ReplayError("Not a game log file")
+        variant = VariantSpec(*variant)
+        try:
+            get_rules(variant.n_features, variant.n_values)
+        except ValueError as e:
+            raise ReplayError(str(e)) from None
+        events = [Event(*e) for e in _EVENT.iter_unpack(body)]
+        return cls(seed, MODES[mode], variant, events)
+
+    def save(self, path):
+        atomic_write(path, self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def file_name(self):
+        return time.strftime("%Y%m%d-%H%M%S-") + f"{self.seed}.sgr"
+
+
+def played_slots(before, board, clicked):
+    """Slots of cards dealt after playing a set, in order of the game log
+
+    Slots of clicked cards go first, then slots filled by variant rules
+    when no set was left on board
+
+    :param before: board before clicked cards were played
+    """
+    slots = [before.index(card) for card in clicked]
+    slots += [
+        slot
+        for slot in range(len(board))
+        if slot not in slots
+        and (slot >= len(before) or board[slot] is not before[slot])
+    ]
+    return slots
+
+
+def replay_game(log):
+    """Play logged game again with the engine only, as fast as possible
+
+    Actions are applied as in GamePlay state: clicked cards are played
+    when there are as many of them as cards in a set, clicking a selected
+    card deselects it and hints use the game random generator.
+
+    :return: Game at the end of the log
+    :raise ReplayError: if dealt cards differ from the log
+    """
+    game = new_game(log.seed, log.mode, log.variant)
+    actions = []
+    selected = []
+
+    def deal(slots):
+        for slot in slots:
+            if game.board[slot] is not None:
+                actions.append((DEAL, game.board[slot].id))
+
+    deal(range(len(game.board)))
+    for event in log.events:
+        if event.kind == DEAL:
+            continue
+        actions.append((event.kind, event.card_id))
+        if event.kind == CLICK:
+            card = game.on_board.get(event.card_id)
+            if card is None:
+                raise ReplayError(f"Card {event.card_id} is not on board")
+            if card in selected:
+                selected.remove(card)
+            else:
+                selected.append(card)
+            if len(selected) == game.rules.set_size:
+                before = list(game.board)
+                if game.play(selected):
+                    deal(played_slots(before, game.board, selected))
+                selected = []
+        elif event.kind == HINT_TEXT:
+            game.hint()
+        elif event.kind == HINT_CARDS:
+            hint = game.hint()
+            if hint is not None:
+                selected = list(hint[:-1])
+        elif event.kind == ADD_COLUMN:
+            deal(game.add_column())
+
+    if actions != log.actions():
+        raise ReplayError("Replayed game differs from the log")
+    return game
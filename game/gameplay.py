@@ -8,140 +8,117 @@ from pyglet.window import key
 from .cards import Cards
 from .configuration import config
 from .constants import *
+from .engine import new_game
 from .fsm import State
-from .hud import TextBase, TextCountable
+from .hud import TextBase, TextCountable, TextToggle
+from .gamelog import ADD_COLUMN, CLICK, HINT_CARDS, HINT_TEXT
 
 
 class GamePlay(State):
-    def execute(self):
-        if self.d.keys[key.R]:
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.hovered = None  # card under mouse pointer
+
+    def on_key_press(self, symbol, modifiers):
+        if symbol == key.R:
             self.d.fsm.transition("toGAME")
-        if self.d.keys[key.F10]:
+        elif symbol == key.F10:
             self.d.fsm.transition("toMENU")
-        if self.d.keys[key.N] and not self.d.new_column_used:
+        elif symbol == key.N and not self.d.cards.game.new_column_used:
+            self.d.record_event(ADD_COLUMN)
             self.add_new_column()
-            self.d.new_column_used = True
-
-        two_cards = self.d.cards.get_two_cards_from_random_set()
-
-        # display number of sets visible on board
-        if self.d.keys[key.G] and two_cards:
-            self.remove_text_hint()  # if exists
-            self.display_text_hint()
-
-        # display two cards from correct set on board
-        if self.d.keys[key.H] and two_cards:
-            self.remove_text_hint()  # if exists
-            for c in self.d.cards.card_clicked:
-                c.outline_delete()
-            self.d.cards.card_clicked = []
-            self.display_hint()
+            self.d.fsm.mark_dirty()
+        elif symbol == key.G:
+            self.d.record_event(HINT_TEXT)
+            # display number of sets visible on board
+            if self.d.cards.get_two_cards_from_random_set():
+                self.display_text_hint()
+                self.d.fsm.mark_dirty()
+        elif symbol == key.H:
+            self.d.record_event(HINT_CARDS)
+            # display all but one cards from correct set on board
+            if self.d.cards.get_two_cards_from_random_set():
+                self.remove_text_hint()  # if shown
+                for c in self.d.cards.card_clicked:
+                    self.d.cards.deselect(c)
+                self.d.cards.card_clicked = []
+                self.display_hint()
+                self.d.fsm.mark_dirty()
 
+    def execute(self):
         clicked = self.d.cards.card_clicked
-        # If player clicked three cards check if they are a set
-        if len(clicked) == 3:
-            if self.d.cards.check_if_cards_are_set(clicked):
-                self.d.score.count += 1
-
-                # reset deck to 12 cards if 15 were in the game
-                add_new_cards = False if len(self.d.cards.cards_used) == 15 else True
-
-                for c in clicked:
-                    c.outline_delete()
-                    self.remove_old_card_and_add_new_one(c, add_new_cards)
-            else:
-                # un-select them, and decrease score
-                self.d.score.count = (
-                    self.d.score.count - 1 if self.d.score.count > 0 else 0
-                )
-                for c in self.d.cards.card_clicked:
-                    c.outline_delete()
+        # If player clicked all cards of a set check if they are a set
+        if len(clicked) == self.d.cards.game.rules.set_size:
+            # un-select them, engine replaces them if they are a set
+            for c in clicked:
+                self.d.cards.deselect(c)
+            self.d.cards.play(clicked)
+            self.d.score.count = self.d.cards.game.score
+            self.d.autosave()
 
             self.d.cards.card_clicked = []
 
             # display number of cards left on top of window
             self.d.cards_number_display.count = self.d.cards.number_of_cards_left()
 
-            self.remove_text_hint()  # if exists
+            self.remove_text_hint()  # if shown
 
         # end of game when there are no left sets
         if not self.d.cards.check_if_set_exists_in_cards_used():
             self.d.fsm.transition("toEND")
 
     def display_hint(self):
-        """Select and scale up two cards"""
-        self.d.cards.card_hint1.outline_draw(self.d.batch, self.d.foreground)
-        self.d.cards.card_hint1.clicked = True
-        self.d.cards.card_clicked.append(self.d.cards.card_hint1)
-        self.d.cards.card_hint2.outline_draw(self.d.batch, self.d.foreground)
-        self.d.cards.card_hint2.clicked = True
-        self.d.cards.card_clicked.append(self.d.cards.card_hint2)
+        """Select all but one cards of a set"""
+        for card in self.d.cards.card_hints:
+            self.d.cards.select(card)
+            self.d.cards.card_clicked.append(card)
 
     def display_text_hint(self):
         """Display number of sets left when hint is requested"""
         txt = HINT_SETS_COUNT_TEXT.format(self.d.cards.number_of_sets_left)
-        self.d.cards_number_display_hint = TextBase(
-            self.d.width // 2 + 100, self.d.height - 75, txt, batch=self.d.batch
-        )
-        self.d.cards_number_display_hint.anchor_x = "right"
-        self.d.cards_number_display_hint.font_size -= 5
+        self.d.cards_number_display_hint.show(txt)
 
     def remove_text_hint(self):
-        """Remove silently hint text if exists"""
-        try:
-            self.d.cards_number_display_hint.delete()
-        except AttributeError:
-            pass
-
-    def remove_old_card_and_add_new_one(self, c, add_new_cards):
-        """First remove card from cards list and its sprite
-        next add new in the same place
-        """
-        old_x, old_y = c.x, c.y
-        self.d.cards.cards_used.remove(c)
-        self.d.cards.cards.remove(c)
-        c.delete()  # remove card sprite from batch
-
-        if self.d.cards.number_of_cards_left() > 0 and add_new_cards:
-            self.d.cards.draw_single_random(old_x, old_y)
+        """Hide hint text, label is reused by the next hint"""
+        self.d.cards_number_display_hint.hide()
 
     def add_new_column(self):
         """Draw additional fifth column of three cards at player request"""
-        subtract_from_x = 100
-        self.d.cards.redraw_columns(subtract_from_x)
-        self.d.cards.draw_random(800 + config.corner_margin.x - subtract_from_x)
+        self.d.cards.add_column()
+        self.d.autosave()
 
         # update cards display
         self.d.cards_number_display.count = self.d.cards.number_of_cards_left()
 
     def on_mouse_press(self, x, y, button, modifiers):
-        for card in self.d.cards.cards_used:
-            # when clicked point (x,y) is inside card box
-            if self.d.is_in_the_box(card, x, y):
-                # that card is scaled up and added into clicked list if it was not there before
-                if card not in self.d.cards.card_clicked:
-                    card.outline_draw(self.d.batch, self.d.foreground)
-                    self.d.cards.card_clicked.append(card)
-                else:
-                    self.d.cards.card_clicked.remove(card)
-                    card.outline_delete()
+        card = self.d.cards.card_at(x, y)
+        if card is not None:
+            self.d.record_event(CLICK, card.id)
+            # that card is scaled up and added into clicked list if it was not there before
+            if card not in self.d.cards.card_clicked:
+                self.d.cards.select(card)
+                self.d.cards.card_clicked.append(card)
+            else:
+                self.d.cards.card_clicked.remove(card)
+                self.d.cards.deselect(card)
+            self.d.fsm.mark_dirty()
         if self.d.is_in_the_box(self.d.menu_box, x, y):
             self.d.fsm.transition("toMENU")
 
     def on_mouse_motion(self, x, y):
-        cursor = self.d.get_system_mouse_cursor(self.d.CURSOR_DEFAULT)
-        self.d.set_mouse_cursor(cursor)
-        for card in self.d.cards.cards_used:
-            if self.d.is_in_the_box(card, x, y):
-                cursor = self.d.get_system_mouse_cursor(self.d.CURSOR_HAND)
-                self.d.set_mouse_cursor(cursor)
+        """Change cursor only when pointer enters or leaves a card"""
+        card = self.d.cards.card_at(x, y)
+        if (card is None) != (self.hovered is None):
+            cursor = self.d.cursor_default if card is None else self.d.cursor_hand
+            self.d.set_mouse_cursor(cursor)
+        self.hovered = card
 
 
 class GameEnd(State):
-    def execute(self):
-        if self.d.keys[key.R]:
+    def on_key_press(self, symbol, modifiers):
+        if symbol == key.R:
             self.d.fsm.transition("toGAME")
-        if self.d.keys[key.F10]:
+        elif symbol == key.F10:
             self.d.fsm.transition("toMENU")
 
     def on_mouse_press(self, x, y, button, modifiers):
@@ -156,61 +133,102 @@ class TransitionToGame(State):
 
     def execute(self):
         self.d.delete_all_objects()
-        self.d.new_column_used = False
 
-        # randomly select features for the game after user menu choice
-        # quickstart game (one feature is False) - 27 cards in game
-        # normal game - 81 cards in game
-        features = 4 * [True]
-        if self.d.set_feature == FEATURES_QUICKSTART:
-            features[random.randint(0, 3)] = False
-        feat_switch = FeatSwitch(*features)
-
-        # initialize deck of cards with selected features
-        self.d.cards = Cards(self.d, rows=3, cols=4, feat_switch=feat_switch)
+        snapshot, self.d.resume_snapshot = self.d.resume_snapshot, None
+        if snapshot is not None:
+            # continue autosaved game, it has no seed and can not be logged
+            self.d.save_game_log()
+            self.d.set_feature = snapshot.mode
+            game = snapshot.game
+            self.d.cards = Cards(self.d, game.rows, game.cols, game=game)
+        else:
+            self.new_game()
 
         # initialize upper hud text
-        self.d.score = TextCountable(
-            self.d.width - 180, self.d.height - 20, RIGHT_HUD_TEXT, batch=self.d.batch
+        scene = self.d.scenes[self.to_state]
+        self.d.score = scene.add(
+            TextCountable(
+                self.d.width - 180,
+                self.d.height - 20,
+                RIGHT_HUD_TEXT,
+                batch=self.d.batch,
+                group=scene.group,
+            )
         )
         self.d.score.font_size -= 10
-        self.d.score.count = 0
-        self.d.cards_number_display = TextCountable(
-            self.d.width - 450, self.d.height - 20, LEFT_HUD_TEXT, batch=self.d.batch
+        self.d.score.count = self.d.cards.game.score
+        self.d.cards_number_display = scene.add(
+            TextCountable(
+                self.d.width - 450,
+                self.d.height - 20,
+                LEFT_HUD_TEXT,
+                batch=self.d.batch,
+                group=scene.group,
+            )
         )
         self.d.cards_number_display.font_size -= 10
         self.d.cards_number_display.count = self.d.cards.number_of_cards_left()
-        self.d.logo = TextBase(
-            260,
-            self.d.height - 20,
-            f"Mode: {self.d.set_feature}",
-            font_size=20,
-            align="left",
-            batch=self.d.batch,
+        self.d.cards_number_display_hint = scene.add(
+            TextToggle(
+                self.d.width // 2 + 100,
+                self.d.height - 75,
+                "",
+                batch=self.d.batch,
+                group=scene.group,
+            )
+        )
+        self.d.cards_number_display_hint.anchor_x = "right"
+        self.d.cards_number_display_hint.font_size -= 5
+        self.d.logo = scene.add(
+            TextBase(
+                260,
+                self.d.height - 20,
+                f"Mode: {self.d.set_feature}",
+                font_size=20,
+                align="left",
+                batch=self.d.batch,
+                group=scene.group,
+            )
         )
         self.d.logo.font_size -= 10
 
-        self.d.menu_btn = TextBase(
-            60,
-            self.d.height - 20,
-            "Menu".format(),
-            batch=self.d.batch,
-            group=self.d.foreground,
+        self.d.menu_btn = scene.add(
+            TextBase(
+                60,
+                self.d.height - 20,
+                "Menu".format(),
+                batch=self.d.batch,
+                group=scene.foreground,
+            )
         )
         self.d.menu_btn.font_size -= 10
-        self.d.menu_box = Box(
-            0,
-            self.d.height - 45,
-            120,
-            45,
-            thickness=1,
-            color=config.outline_box.color,
-            batch=self.d.batch,
-            group=self.d.foreground,
+        self.d.menu_box = scene.add(
+            Box(
+                0,
+                self.d.height - 45,
+                120,
+                45,
+                thickness=1,
+                color=config.outline_box.color,
+                batch=self.d.batch,
+                group=scene.foreground,
+            )
         )
 
+        self.d.autosave()
         self.d.fsm.set_state("GAME")
 
+    def new_game(self):
+        # every game has its own seed, so it can be replayed from the game log
+        seed = self.d.seed if self.d.seed is not None else random.getrandbits(32)
+        self.d.seed = None
+        mode = self.d.set_feature
+        variant = self.d.variant if mode == FEATURES_VARIANT else CLASSIC_VARIANT
+        self.d.start_game_log(seed, mode, variant)
+        # the same deal as in simulations and engine replay of the game log
+        game = new_game(seed, mode, variant)
+        self.d.cards = Cards(self.d, game.rows, game.cols, game=game)
+
 
 class TransitionToEnd(State):
     def __init__(self, to_state, *args):
@@ -219,13 +237,19 @@ class TransitionToEnd(State):
 
     def execute(self):
         # remove any leftover cards from screen
-        if len(self.d.cards.cards_used) > 0:
-            for c in self.d.cards.cards_used:
-                c.delete()
-            self.d.cards.cards_used = []
-
-        self.d.text_end_game = TextBase(
-            self.d.width // 2, self.d.height // 2, END_GAME_TEXT, batch=self.d.batch
+        self.d.cards.remove_all()
+        # finished game can not be resumed
+        self.d.autosaver.remove()
+
+        scene = self.d.scenes["GAME"]
+        self.d.text_end_game = scene.add(
+            TextBase(
+                self.d.width // 2,
+                self.d.height // 2,
+                END_GAME_TEXT,
+                batch=self.d.batch,
+                group=scene.group,
+            )
         )
         self.d.text_end_game.font_size += 10
 
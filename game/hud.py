@@ -22,12 +22,15 @@ class TextBase(pyglet.text.Label):
 
 
 class TextCountable(TextBase):
-    """Class for text on the screen with variable count"""
+    """Class for text on the screen with variable count
+
+    Text layout is expensive, so the label is updated only when count changes
+    """
 
     def __init__(self, x, y, _text, batch, *args, **kwargs):
         super().__init__(x, y, _text, batch, *args, **kwargs)
         self._text = _text
-        self._count = 0
+        self._count = None  # count is not displayed yet
 
     @property
     def count(self):
@@ -35,5 +38,28 @@ class TextCountable(TextBase):
 
     @count.setter
     def count(self, value):
+        if value == self._count:
+            return
         self._count = value
         self.text = self._text + str(self._count)
+
+
+class TextToggle(TextBase):
+    """Text shown and hidden many times with the same label
+
+    Label is laid out again only when shown with a different text
+    """
+
+    def __init__(self, x, y, text, batch, *args, **kwargs):
+        super().__init__(x, y, text, batch, *args, **kwargs)
+        self.visible = False
+
+    def show(self, text):
+        if text != self.text:
+            self.text = text
+        if not self.visible:
+            self.visible = True
+
+    def hide(self):
+        if self.visible:
+            self.visible = False
@@ -0,0 +1,92 @@
+"""Main loop of the game window
+
+Loop mode is set in configuration or with SET_GAME_LOOP environment variable:
+
+fixed: logic ticks at a fixed rate, frames are drawn at frame rate,
+    ``window.interpolation`` is the part of the next tick already elapsed
+event: nothing runs while the game is idle, window is redrawn only
+    after an input event, for low power devices
+vsync: one logic tick and one frame for every display refresh
+"""
+from __future__ import annotations
+
+import os
+import time
+
+import pyglet
+
+from .configuration import config
+
+LOOP_FIXED = "fixed"
+LOOP_EVENT = "event"
+LOOP_VSYNC = "vsync"
+LOOP_MODES = (LOOP_FIXED, LOOP_EVENT, LOOP_VSYNC)
+
+# longer pause, e.g. window dragging, does not run a burst of logic ticks
+MAX_FRAME_TIME = 0.25
+
+
+class LoopStats:
+    """Achieved frames and logic ticks per second, updated every period"""
+
+    def __init__(self, period=1.0):
+        self.period = period
+        self.fps = 0.0
+        self.logic_hz = 0.0
+        self._frames = 0
+        self._ticks = 0
+        self._start = time.perf_counter()
+
+    def frame(self):
+        self._frames += 1
+        self._update()
+
+    def tick(self):
+        self._ticks += 1
+        self._update()
+
+    def _update(self):
+        elapsed = time.perf_counter() - self._start
+        if elapsed >= self.period:
+            self.fps = self._frames / elapsed
+            self.logic_hz = self._ticks / elapsed
+            self._frames = self._ticks = 0
+            self._start += elapsed
+
+
+def run(window, settings=config.game_loop):
+    """Run pyglet application with logic and drawing of the window in given mode"""
+    mode = os.environ.get("SET_GAME_LOOP", settings.mode)
+    if mode not in LOOP_MODES:
+        raise ValueError(f"Unknown loop mode: {mode}")
+    window.loop_mode = mode
+    window.fsm.execute()
+
+    if mode == LOOP_FIXED:
+        step = 1 / settings.logic_hz
+        accumulator = 0.0
+
+        def frame(dt):
+            nonlocal accumulator
+            accumulator += min(dt, MAX_FRAME_TIME)
+            while accumulator >= step:
+                window.update(step)
+                accumulator -= step
+            window.interpolation = accumulator / step
+            window.draw(dt)
+
+        pyglet.clock.schedule_interval(frame, 1 / settings.frame_rate)
+
+    elif mode == LOOP_VSYNC:
+        window.set_vsync(True)
+
+        def frame(dt):
+            window.update(dt)
+            window.draw(dt)
+
+        pyglet.clock.schedule(frame)
+
+    else:
+        window.request_redraw()
+
+    pyglet.app.run(None)
@@ -2,7 +2,6 @@ from __future__ import annotations
 
 from functools import wraps
 
-import pyglet
 from pyglet.shapes import Box
 from pyglet.window import key
 
@@ -23,114 +22,167 @@ def _formatter(func):
         self.d.current_selection = self.d.menu_items[self.d.current_index]
         self.d.current_selection.bold = True
         self.d.current_selection.font_size += 3
+        self.d.fsm.mark_dirty()
 
     return wrapper
 
 
+# Resume item is displayed above Start only when there is an autosaved game
+RESUME_INDEX = 3
+# game modes in order of the option menu item, from left
+MENU_MODES = [FEATURES_QUICKSTART, FEATURES_NORMAL, FEATURES_VARIANT]
+
+
 class GameMenu(State):
     def __init__(self, *args):
         super().__init__(*args)
         self.start_box = None
         self.option_box = None
         self.exit_box = None
+        self.resume_box = None
+
+    def menu_order(self):
+        """Indexes of menu items from top to bottom"""
+        if self.resume_box is not None:
+            return [RESUME_INDEX, 0, 1, 2]
+        return [0, 1, 2]
 
     @_formatter
     def selection_up(self):
         """Re-set menu selection"""
-        self.d.current_index -= 1
-        if self.d.current_index < 0:
-            self.d.current_index = 2
+        order = self.menu_order()
+        self.d.current_index = order[order.index(self.d.current_index) - 1]
 
     @_formatter
     def selection_down(self):
         """Re-set menu selection"""
-        self.d.current_index += 1
-        if self.d.current_index > 2:
-            self.d.current_index = 0
-        return
+        order = self.menu_order()
+        position = (order.index(self.d.current_index) + 1) % len(order)
+        self.d.current_index = order[position]
 
     def start_game(self):
-        """Remove menu text objects and transition to game"""
-        for item in self.d.menu_items:
-            item.delete()
-        self.start_box.delete()
-        self.option_box.delete()
-        self.exit_box.delete()
+        """Remove menu objects and transition to game"""
+        self.delete_menu()
         self.d.fsm.transition("toGAME")
 
+    def set_mode(self, mode):
+        """Choose game mode and show it in option menu item"""
+        self.d.set_feature = mode
+        if mode == FEATURES_QUICKSTART:
+            text = MENU_TEXT_FEATURES_QUICKSTART
+        elif mode == FEATURES_NORMAL:
+            text = MENU_TEXT_FEATURES_NORMAL
+        else:
+            variant = self.d.variant
+            text = MENU_TEXT_FEATURES_VARIANT.format(
+                variant.n_values**variant.n_features
+            )
+        self.d.menu_items[1].text = text
+        self.d.fsm.mark_dirty()
+
+    def change_mode(self, step, wrap=False):
+        """Move mode selection left or right"""
+        position = MENU_MODES.index(self.d.set_feature) + step
+        if wrap:
+            position %= len(MENU_MODES)
+        if 0 <= position < len(MENU_MODES):
+            self.set_mode(MENU_MODES[position])
+
+    def resume_game(self):
+        """Continue autosaved game"""
+        self.d.resume_snapshot = self.d.saved_game
+        self.start_game()
+
     def menu_boxes(self, batch):
+        """Create menu item boxes, they live as long as menu is displayed"""
+        scene = self.d.scenes["MENU"]
         self.start_box = Box(
             285, 400, 460, 85,
             thickness=1,
             color=config.outline_box.color,
             batch=batch,
+            group=scene.group,
         )
-        # self.start_box.visible = False
-        self.start_box.draw()
         self.option_box = Box(
             285, 300, 460, 85,
             thickness=1,
             color=config.outline_box.color,
             batch=batch,
+            group=scene.group,
         )
-        # self.option_box.visible = False
-        self.option_box.draw()
         self.exit_box = Box(
             285, 200, 460, 85,
             thickness=1,
             color=config.outline_box.color,
             batch=batch,
+            group=scene.group,
         )
-        # self.exit_box.visible = False
-        self.exit_box.draw()
+        for box in (self.start_box, self.option_box, self.exit_box):
+            scene.add(box)
+        if self.d.saved_game is not None:
+            self.resume_box = Box(
+                285, 500, 460, 85,
+                thickness=1,
+                color=config.outline_box.color,
+                batch=batch,
+                group=scene.group,
+            )
+            scene.add(self.resume_box)
 
-    def execute(self):
-        self.menu_boxes(self.d.batch)
-        if self.d.keys[key.DOWN] and self.d.current_index < 2:
+    def delete_menu(self):
+        """Remove menu text objects and boxes from batch"""
+        self.d.scenes["MENU"].clear()
+        self.resume_box = None
+
+    def on_key_press(self, symbol, modifiers):
+        order = self.menu_order()
+        if symbol == key.DOWN and self.d.current_index != order[-1]:
             self.selection_down()
-        elif self.d.keys[key.UP] and self.d.current_index > 0:
+        elif symbol == key.UP and self.d.current_index != order[0]:
             self.selection_up()
 
         elif self.d.current_index == 1:
-            if self.d.keys[key.RIGHT]:
-                self.d.set_feature = FEATURES_NORMAL
-                self.d.current_selection.text = MENU_TEXT_FEATURES_NORMAL
-            elif self.d.keys[key.LEFT]:
-                self.d.set_feature = FEATURES_QUICKSTART
-                self.d.current_selection.text = MENU_TEXT_FEATURES_QUICKSTART
-
-        elif self.d.keys[key.ENTER]:
+            if symbol == key.RIGHT:
+                self.change_mode(1)
+            elif symbol == key.LEFT:
+                self.change_mode(-1)
+
+        elif symbol == key.ENTER:
             if self.d.current_index == 0:
                 self.start_game()
-            elif self.d.current_index == 1:
-                pass
             elif self.d.current_index == 2:
-                pyglet.app.exit()
+                self.d.shutdown()
+            elif self.d.current_index == RESUME_INDEX:
+                self.resume_game()
 
     def on_mouse_press(self, x, y, button, modifiers):
         if self.d.is_in_the_box(self.start_box, x, y):
             self.start_game()
         elif self.d.is_in_the_box(self.option_box, x, y):
-            if self.d.current_selection.text == MENU_TEXT_FEATURES_QUICKSTART:
-                self.d.set_feature = FEATURES_NORMAL
-                self.d.current_selection.text = MENU_TEXT_FEATURES_NORMAL
-            else:
-                self.d.set_feature = FEATURES_QUICKSTART
-                self.d.current_selection.text = MENU_TEXT_FEATURES_QUICKSTART
+            self.change_mode(1, wrap=True)
         elif self.d.is_in_the_box(self.exit_box, x, y):
-            pyglet.app.exit()
+            self.d.shutdown()
+        elif self.resume_box and self.d.is_in_the_box(self.resume_box, x, y):
+            self.resume_game()
 
     @_formatter
     def select_index(self, i):
         self.d.current_index = i
 
     def on_mouse_motion(self, x, y):
+        """Select menu item under pointer, if it is not selected already"""
         if self.d.is_in_the_box(self.start_box, x, y):
-            self.select_index(0)
+            index = 0
         elif self.d.is_in_the_box(self.option_box, x, y):
-            self.select_index(1)
+            index = 1
         elif self.d.is_in_the_box(self.exit_box, x, y):
-            self.select_index(2)
+            index = 2
+        elif self.resume_box and self.d.is_in_the_box(self.resume_box, x, y):
+            index = RESUME_INDEX
+        else:
+            return
+        if index != self.d.current_index:
+            self.select_index(index)
 
 
 class TransitionToMenu(State):
@@ -140,12 +192,14 @@ class TransitionToMenu(State):
 
     def execute(self):
         self.d.delete_all_objects()
+        scene = self.d.scenes[self.to_state]
 
         start_game_menu_item = TextBase(
             self.d.width // 2,
             self.d.height // 2 + 150,
             MENU_START_GAME_TEXT,
             batch=self.d.batch,
+            group=scene.group,
         )
         start_game_menu_item.bold = True
         start_game_menu_item.font_size += 10
@@ -154,12 +208,14 @@ class TransitionToMenu(State):
             self.d.height // 2 + 50,
             MENU_TEXT_FEATURES_QUICKSTART,
             batch=self.d.batch,
+            group=scene.group,
         )
         end_game_menu_item = TextBase(
             self.d.width // 2,
             self.d.height // 2 - 50,
             MENU_END_GAME_TEXT,
             batch=self.d.batch,
+            group=scene.group,
         )
         self.d.menu_items = [
             start_game_menu_item,
@@ -169,6 +225,17 @@ class TransitionToMenu(State):
         self.d.current_index = 0
         self.d.current_selection = self.d.menu_items[0]
 
+        self.d.saved_game = self.d.load_autosave()
+        if self.d.saved_game is not None:
+            resume_menu_item = TextBase(
+                self.d.width // 2,
+                self.d.height // 2 + 250,
+                MENU_RESUME_GAME_TEXT,
+                batch=self.d.batch,
+                group=scene.group,
+            )
+            self.d.menu_items.append(resume_menu_item)
+
         self.d.set_feature = FEATURES_QUICKSTART
 
         help_menu_item = TextBase(
@@ -176,6 +243,7 @@ class TransitionToMenu(State):
             self.d.height // 6,
             HELP_TEXT,
             batch=self.d.batch,
+            group=scene.group,
             multiline=True,
             width=self.d.width,
         )
@@ -187,8 +255,13 @@ class TransitionToMenu(State):
             self.d.height // 6,
             HELP_TEXT_2,
             batch=self.d.batch,
+            group=scene.group,
             multiline=True,
             width=self.d.width,
         )
         help_menu_item2.font_size -= 18
         self.d.menu_items.append(help_menu_item2)
+        for item in self.d.menu_items:
+            scene.add(item)
+
+        self.d.fsm.states[self.to_state].menu_boxes(self.d.batch)
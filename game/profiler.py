@@ -0,0 +1,157 @@
+"""Opt-in timing of FSM states, transitions and batch drawing
+
+Profiling is toggled with F3 key or enabled at start with
+SET_GAME_PROFILE=1 environment variable. With SET_GAME_TRACE=path
+every measured call is also written to a Chrome trace file,
+which can be opened in chrome://tracing or ui.perfetto.dev
+"""
+from __future__ import annotations
+
+import gc
+import json
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import partial
+
+import pyglet
+from pyglet.shapes import ShapeBase
+from pyglet.sprite import Sprite
+from pyglet.text.layout import TextLayout
+
+from .hud import TextBase
+from .scene import untracked
+
+
+def percentile(values, q):
+    """Nearest rank percentile of sorted values"""
+    index = max(0, min(len(values) - 1, round(q / 100 * len(values)) - 1))
+    return values[index]
+
+
+def batch_stats(batch):
+    """Count objects alive in the batch
+
+    Vertices are read from batch domains, sprites, shapes and labels
+    are found with garbage collector, so it is too slow to call every frame
+    """
+    stats = {
+        "vertices": sum(
+            domain.allocator.capacity - domain.allocator.get_free_size()
+            for domain_map in batch.group_map.values()
+            for domain in domain_map.values()
+        ),
+        "vertex_lists": 0,
+        "sprites": 0,
+        "shapes": 0,
+        "labels": 0,
+    }
+    for obj in gc.get_objects():
+        if isinstance(obj, (Sprite, ShapeBase)):
+            if obj._batch is batch and obj._vertex_list is not None:
+                stats["sprites" if isinstance(obj, Sprite) else "shapes"] += 1
+                stats["vertex_lists"] += 1
+        elif isinstance(obj, TextLayout):
+            if obj._batch is batch and obj._vertex_lists:
+                stats["labels"] += 1
+                stats["vertex_lists"] += len(obj._vertex_lists)
+    return stats
+
+
+class Profiler:
+    """Rolling window of durations of every measured call"""
+
+    def __init__(self, window=600, trace_path=None):
+        self.samples = defaultdict(partial(deque, maxlen=window))
+        self._origin = time.perf_counter()
+        self._trace = None
+        if trace_path:
+            self._trace = open(trace_path, "w")
+            self._trace.write("[\n")
+            self._trace_separator = ""
+
+    @contextmanager
+    def measure(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter())
+
+    def record(self, name, start, end):
+        self.samples[name].append(end - start)
+        if self._trace is not None:
+            event = {
+                "name": name,
+                "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": 0,
+                "tid": 0,
+            }
+            self._trace.write(self._trace_separator + json.dumps(event))
+            self._trace_separator = ",\n"
+
+    def summary(self):
+        """p50, p95 and p99 of every measured name in milliseconds"""
+        result = {}
+        for name, samples in self.samples.items():
+            values = sorted(samples)
+            result[name] = tuple(percentile(values, q) * 1000 for q in (50, 95, 99))
+        return result
+
+    def close(self):
+        if self._trace is not None:
+            self._trace.write("\n]\n")
+            self._trace.close()
+            self._trace = None
+
+
+class ProfilerOverlay:
+    """HUD text with profiler percentiles and batch counters
+
+    It has its own batch, so it does not change counters of the game batch
+    """
+
+    def __init__(self, director, profiler, interval=0.5):
+        self.d = director
+        self.profiler = profiler
+        self.batch = pyglet.graphics.Batch()
+        self.text = TextBase(
+            10,
+            self.d.height - 50,
+            "",
+            batch=self.batch,
+            multiline=True,
+            width=self.d.width,
+        )
+        self.text.font_name = "Courier New"
+        self.text.font_size = 9
+        self.text.anchor_x = "left"
+        self.text.anchor_y = "top"
+        pyglet.clock.schedule_interval(self.refresh, interval)
+
+    def refresh(self, dt):
+        lines = [f"{'ms':<40}{'p50':>8}{'p95':>8}{'p99':>8}"]
+        for name, (p50, p95, p99) in sorted(self.profiler.summary().items()):
+            lines.append(f"{name:<40}{p50:>8.3f}{p95:>8.3f}{p99:>8.3f}")
+        stats = batch_stats(self.d.batch)
+        lines.append(", ".join(f"{k}: {v}" for k, v in stats.items()))
+        scenes = self.d.scenes.values()
+        lines.append(
+            ", ".join(f"{s.name}: {len(s)} ({s.created} created)" for s in scenes)
+            + f", untracked: {untracked(stats, [*scenes, self.d.slot_outlines])}"
+        )
+        loop = self.d.loop_stats
+        lines.append(
+            f"loop: {self.d.loop_mode}, fps: {loop.fps:.1f}, logic: {loop.logic_hz:.1f} Hz"
+        )
+        self.text.text = "\n".join(lines)
+        self.d.request_redraw()
+
+    def draw(self):
+        self.batch.draw()
+
+    def delete(self):
+        pyglet.clock.unschedule(self.refresh)
+        self.text.delete()
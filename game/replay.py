@@ -0,0 +1,51 @@
+"""Replay of a game log in the game window
+
+Player actions are passed to the window as mouse and key events,
+game.gamelog.replay_game plays the log with the engine only.
+"""
+from __future__ import annotations
+
+from pyglet.window import key, mouse
+
+from .constants import FEATURES_VARIANT
+from .gamelog import ADD_COLUMN, CLICK, HINT_CARDS, HINT_TEXT, ReplayError
+
+# keys pressed in GamePlay state for events without card
+_EVENT_KEYS = {HINT_TEXT: key.G, HINT_CARDS: key.H, ADD_COLUMN: key.N}
+
+
+def replay(director, log, draw=True):
+    """Play logged game again in director as fast as possible
+
+    Player actions are passed to the director as mouse and key events,
+    so the same code runs as in the original game.
+
+    :param draw: draw the window after every action like a frame would
+    :raise ReplayError: if dealt cards differ from the log
+    """
+    director.fsm.execute()
+    director.seed = log.seed
+    director.set_feature = log.mode
+    if log.mode == FEATURES_VARIANT:
+        director.variant = log.variant
+    menu = director.fsm.states["MENU"]
+    if director.fsm.cur_state is menu:
+        menu.start_game()
+    else:
+        director.fsm.transition("toGAME")
+    director.fsm.execute()
+    for event in log.events:
+        if event.kind == CLICK:
+            cards = director.cards
+            card = cards.game.rules.cards[event.card_id]
+            x, y = cards.slot_xy(cards.game.board.index(card))
+            x += cards.renderer.card_width // 2
+            y += cards.renderer.card_height // 2
+            director.on_mouse_press(x, y, mouse.LEFT, 0)
+        elif event.kind in _EVENT_KEYS:
+            director.on_key_press(_EVENT_KEYS[event.kind], 0)
+        if draw:
+            director.on_draw()
+
+    if director.game_log.actions() != log.actions():
+        raise ReplayError("Replayed game differs from the log")
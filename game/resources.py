@@ -1,10 +1,193 @@
+"""Loading of card images
+
+Decoding spritesheet png is the slowest part of the game start,
+so decoded pixels are cached on disk (already scaled to card size
+when numpy is installed) and single card regions are cut from
+the texture only when a card is used for the first time.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import struct
+from pathlib import Path
+
 import pyglet
 
+from .faces import CardFaces
+from .files import atomic_write
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, cached sheet is not scaled then
+    np = None
+
+SPRITESHEET = "spritesheet.png"
+GRID_ROWS = 9
+GRID_COLUMNS = 9
+
+# magic, width, height, scale applied to pixels
+_CACHE_HEADER = struct.Struct("<4sIIf")
+_CACHE_MAGIC = b"SGC1"
+
+
+class CardImages:
+    """Sequence of card images cut lazily from spritesheet texture
+
+    Index order is the same as in pyglet.image.ImageGrid.
+    Texture may be already scaled, sprites need only the remaining
+    part of the card scale, which is ``card_scale / self.scale``
+    """
+
+    def __init__(self, texture, scale, rows=GRID_ROWS, columns=GRID_COLUMNS):
+        self.texture = texture
+        self.scale = scale
+        self.rows = rows
+        self.columns = columns
+        self.item_width = texture.width // columns
+        self.item_height = texture.height // rows
+        self._items = {}
+
+    def __len__(self):
+        return self.rows * self.columns
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError(f"Card image index out of range: {index}")
+        item = self._items.get(index)
+        if item is None:
+            row, col = divmod(index, self.columns)
+            item = self._items[index] = self.texture.get_region(
+                col * self.item_width,
+                row * self.item_height,
+                self.item_width,
+                self.item_height,
+            )
+        return item
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def cache_dir() -> Path:
+    """Directory for decoded images, can be changed with SET_GAME_CACHE"""
+    path = os.environ.get("SET_GAME_CACHE")
+    return Path(path or pyglet.resource.get_data_path("set-game"))
+
+
+def _cache_path(png: bytes, scale: float) -> Path:
+    digest = hashlib.sha1(png).hexdigest()[:16]
+    return cache_dir() / f"spritesheet-{digest}-{scale:g}.rgba"
+
+
+def _read_cache(path: Path) -> pyglet.image.ImageData | None:
+    try:
+        with open(path, "rb") as f:
+            magic, width, height, _ = _CACHE_HEADER.unpack(
+                f.read(_CACHE_HEADER.size)
+            )
+            data = f.read()
+    except (OSError, struct.error):
+        return None
+    if magic != _CACHE_MAGIC or len(data) != width * height * 4:
+        return None
+    return pyglet.image.ImageData(width, height, "RGBA", data)
+
+
+def _write_cache(path: Path, image: pyglet.image.ImageData, scale: float):
+    """Save decoded pixels, cache is optional so errors are ignored"""
+    data = image.get_data("RGBA", image.width * 4)
+    header = _CACHE_HEADER.pack(_CACHE_MAGIC, image.width, image.height, scale)
+    try:
+        atomic_write(path, header + data)
+    except OSError:
+        pass
+
+
+def _scale_cards(image, scale, rows=GRID_ROWS, columns=GRID_COLUMNS):
+    """Bilinear resize of every card cell, the same filtering as sprite scaling
+
+    Cells are scaled separately, so card borders stay on the grid
+    of the new image and every card has the same integer size.
+    """
+    cell_width, cell_height = image.width // columns, image.height // rows
+    new_width, new_height = round(cell_width * scale), round(cell_height * scale)
+    data = image.get_data("RGBA", image.width * 4)
+    src = np.frombuffer(data, dtype=np.uint8).reshape(image.height, image.width, 4)
+    src = src.astype(np.float32)
+
+    def axis(size, new_size, count):
+        """Source pixels and weights for one axis, cell by cell"""
+        pos = np.clip((np.arange(new_size) + 0.5) / scale - 0.5, 0, size - 1)
+        low = np.floor(pos).astype(np.intp)
+        high = np.minimum(low + 1, size - 1)
+        offsets = np.arange(count)[:, None] * size
+        weight = np.tile((pos - low).astype(np.float32), count)
+        return (offsets + low).ravel(), (offsets + high).ravel(), weight
+
+    y0, y1, wy = axis(cell_height, new_height, rows)
+    x0, x1, wx = axis(cell_width, new_width, columns)
+    wx, wy = wx[None, :, None], wy[:, None, None]
+    top = src[y0][:, x0] * (1 - wx) + src[y0][:, x1] * wx
+    bottom = src[y1][:, x0] * (1 - wx) + src[y1][:, x1] * wx
+    pixels = np.rint(top * (1 - wy) + bottom * wy).astype(np.uint8)
+    return pyglet.image.ImageData(
+        new_width * columns, new_height * rows, "RGBA", pixels.tobytes()
+    )
+
+
+def read_images_from_disk(
+    card_scale: float = 1.0,
+    filename: str = SPRITESHEET,
+    rows: int = GRID_ROWS,
+    columns: int = GRID_COLUMNS,
+) -> CardImages:
+    """Read spritesheet into texture with lazily created card images.
+
+    :param card_scale: scale of cards on screen, applied to cached pixels
+        when numpy is available
+    :return: CardImages
+    """
+    with pyglet.resource.file(filename) as f:
+        png = f.read()
+    scale = card_scale if np is not None else 1.0
+    path = _cache_path(png, scale)
+
+    image = _read_cache(path)
+    if image is None:
+        image = pyglet.image.load(filename, file=io.BytesIO(png))
+        image = image.get_image_data()
+        if scale != 1.0:
+            image = _scale_cards(image, scale, rows, columns)
+        _write_cache(path, image, scale)
+    return CardImages(image.get_texture(), scale, rows, columns)
+
+
+def spritesheet_grid(rules):
+    """File name, rows and columns of spritesheet with the rules deck
+
+    Variant spritesheets are named by deck, e.g. spritesheet-5x3.png,
+    the classic one has 9 x 9 cards
+    """
+    if rules.n_features == 4 and rules.n_values == 3:
+        return SPRITESHEET, GRID_ROWS, GRID_COLUMNS
+    rows = rules.n_values ** (rules.n_features // 2)
+    columns = rules.deck_size // rows
+    return f"spritesheet-{rules.n_features}x{rules.n_values}.png", rows, columns
+
 
-def read_images_from_disk() -> pyglet.image.ImageGrid:
-    """Read images from disk into sequence, grid and texture.
+def card_images(rules, width, height):
+    """Images of the rules deck for cards of width x height on screen,
+    cut from spritesheet or drawn when there is no spritesheet of that deck
 
-    :return: ImageGrid
+    :return: Tuple of card images and scale of the images on screen
     """
-    deck = pyglet.resource.image("spritesheet.png")
-    return pyglet.image.ImageGrid(deck, 9, 9)
+    filename, rows, columns = spritesheet_grid(rules)
+    try:
+        images = read_images_from_disk(1.0, filename, rows, columns)
+    except pyglet.resource.ResourceNotFoundException:
+        return CardFaces(rules, width, height), 1.0
+    scale = min(width / images.item_width, height / images.item_height)
+    return images, scale
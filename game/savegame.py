@@ -0,0 +1,188 @@
+"""Autosave of the game in progress
+
+Snapshot keeps everything needed to continue a game without dealing again:
+
+    header: magic, features, values, rows, columns, mode index, score,
+            new column used, draw pile size, board size
+    mask of all cards in the game (one bit per card of the deck)
+    draw pile card ids, board card ids (EMPTY_SLOT for empty slot),
+    two bytes each
+
+Snapshots are written by a background thread, so saving after every
+move does not delay drawing of the next frame.
+"""
+from __future__ import annotations
+
+import os
+import struct
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+import pyglet
+
+from .engine import Game, get_rules, iter_bits
+from .files import atomic_write
+from .gamelog import MODES
+
+_HEADER = struct.Struct("<4sBBBBBHBHH")
+_MAGIC = b"SGS2"
+EMPTY_SLOT = 0xFFFF
+
+Snapshot = namedtuple("Snapshot", "game mode")
+
+
+class SaveError(Exception):
+    pass
+
+
+def save_path() -> Path:
+    """Autosave file, can be changed with SET_GAME_SAVE"""
+    path = os.environ.get("SET_GAME_SAVE")
+    if path:
+        return Path(path)
+    return Path(pyglet.resource.get_data_path("set-game")) / "autosave.sgs"
+
+
+def _mask_size(rules):
+    return (rules.deck_size + 7) // 8
+
+
+def dump(game, mode) -> bytes:
+    rules = game.rules
+    header = _HEADER.pack(
+        _MAGIC,
+        rules.n_features,
+        rules.n_values,
+        game.rows,
+        game.cols,
+        MODES.index(mode),
+        game.score,
+        game.new_column_used,
+        len(game.deck),
+        len(game.board),
+    )
+    game_mask = game.deck_mask | game.board_mask | game.used_mask
+    ids = [c.id for c in game.deck] + [
+        EMPTY_SLOT if c is None else c.id for c in game.board
+    ]
+    return b"".join(
+        (
+            header,
+            game_mask.to_bytes(_mask_size(rules), "little"),
+            struct.pack(f"<{len(ids)}H", *ids),
+        )
+    )
+
+
+def load(data) -> Snapshot:
+    """Restore game from snapshot bytes
+
+    :raise SaveError: if data is not a valid snapshot
+    """
+    try:
+        (
+            magic,
+            n_features,
+            n_values,
+            rows,
+            cols,
+            mode,
+            score,
+            column_used,
+            n_deck,
+            n_board,
+        ) = _HEADER.unpack_from(data)
+    except struct.error:
+        raise SaveError("Snapshot is too short") from None
+    if magic != _MAGIC or mode >= len(MODES):
+        raise SaveError("Not a game snapshot")
+    try:
+        rules = get_rules(n_features, n_values)
+    except ValueError as e:
+        raise SaveError(str(e)) from None
+    offset = _HEADER.size + _mask_size(rules)
+    if len(data) != offset + 2 * (n_deck + n_board):
+        raise SaveError("Not a game snapshot")
+    mask = int.from_bytes(data[_HEADER.size : offset], "little")
+    ids = struct.unpack_from(f"<{n_deck + n_board}H", data, offset)
+    deck, board = ids[:n_deck], ids[n_deck:]
+    size = rules.deck_size
+    if (
+        mask >> size
+        or max(deck, default=0) >= size
+        or any(i >= size and i != EMPTY_SLOT for i in board)
+    ):
+        raise SaveError("Snapshot has unknown cards")
+
+    cards = rules.cards
+    game = Game.from_state(
+        cards=[cards[i] for i in iter_bits(mask)],
+        deck=[cards[i] for i in deck],
+        board=[None if i == EMPTY_SLOT else cards[i] for i in board],
+        rows=rows,
+        cols=cols,
+        score=score,
+        new_column_used=bool(column_used),
+        rules=rules,
+    )
+    return Snapshot(game, MODES[mode])
+
+
+class AutoSaver:
+    """Write the latest snapshot to file in a background thread
+
+    Only the newest snapshot is kept when saving is slower than playing.
+    ``data`` is the last saved snapshot, read from file at start
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        try:
+            self.data = self.path.read_bytes()
+        except OSError:
+            self.data = None
+        self._pending = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+        self._thread.start()
+
+    def save(self, data):
+        self._put(data)
+
+    def remove(self):
+        """Delete saved snapshot, e.g. after the game has ended"""
+        self._put(b"")
+
+    def _put(self, data):
+        with self._cond:
+            self.data = data or None
+            self._pending = data
+            self._cond.notify()
+
+    def close(self):
+        """Write pending snapshot and stop the thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                data, self._pending = self._pending, None
+            if data is None:
+                return
+            try:
+                self._write(data)
+            except OSError as e:
+                print(f"Game was not saved: {e}")
+
+    def _write(self, data):
+        if not data:
+            self.path.unlink(missing_ok=True)
+            return
+        atomic_write(self.path, data)
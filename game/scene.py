@@ -0,0 +1,51 @@
+"""Objects drawn by game screens
+
+Every label and shape created by a state is added to the scene of that state,
+so the whole screen is removed from the batch at once. Cards are not
+part of any scene, board renderer keeps its vertex list for the whole run.
+"""
+from __future__ import annotations
+
+import pyglet
+
+
+class Scene:
+    """Labels and shapes of one screen, drawn in their own groups
+
+    ``created`` and ``deleted`` count objects since start,
+    so objects left in the batch after teardown can be found
+    """
+
+    def __init__(self, name, order):
+        self.name = name
+        self.group = pyglet.graphics.Group(order=order)
+        self.foreground = pyglet.graphics.Group(order=1, parent=self.group)
+        self._objects = []
+        self.created = 0
+        self.deleted = 0
+
+    def add(self, obj):
+        """Register object for teardown and return it"""
+        self._objects.append(obj)
+        self.created += 1
+        return obj
+
+    def clear(self):
+        """Delete all objects of the scene from batch"""
+        for obj in reversed(self._objects):
+            obj.delete()
+        self.deleted += len(self._objects)
+        self._objects.clear()
+
+    def __len__(self):
+        return len(self._objects)
+
+
+def untracked(stats, owners):
+    """Number of labels and shapes in batch that do not belong to any owner
+
+    :param stats: game.profiler.batch_stats of the batch
+    :param owners: scenes and other collections of shapes, e.g. slot outlines
+    :return: Number of leaked objects, it should be 0
+    """
+    return stats["shapes"] + stats["labels"] - sum(len(o) for o in owners)
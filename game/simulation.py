@@ -0,0 +1,169 @@
+"""Headless Monte Carlo simulation of whole games
+
+Games are played by player strategies on top of the engine rules,
+every game gets its own seed, so any single game can be played again.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import multiprocessing
+import sys
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+
+from .engine import new_game
+
+ADD_COLUMN = "add_column"
+
+RESULT_FIELDS = [
+    "seed",
+    "mode",
+    "strategy",
+    "moves",
+    "sets_found",
+    "mistakes",
+    "score",
+    "cards_left",
+    "board_size",
+    "column_used",
+    "end_reason",
+]
+
+
+def random_player(game, rng):
+    """Play random set from board"""
+    return rng.choice(game.sets)
+
+
+def first_player(game, rng):
+    """Play the oldest set on board"""
+    return game.sets[0]
+
+
+def cautious_player(game, rng):
+    """Add fifth column when only one set is left on board"""
+    if len(game.sets) == 1 and not game.new_column_used and game.cards_left() > 0:
+        return ADD_COLUMN
+    return rng.choice(game.sets)
+
+
+# player strategy gets the game and random generator and returns
+# three cards to play or ADD_COLUMN
+STRATEGIES = {
+    "random": random_player,
+    "first": first_player,
+    "cautious": cautious_player,
+}
+
+
+def play_game(seed, mode, strategy="random", mistake_rate=0.0, max_moves=1000):
+    """Play single game until there are no sets on board
+
+    :param seed: seed of the game random generator
+    :param mode: FEATURES_QUICKSTART or FEATURES_NORMAL
+    :param strategy: name of player strategy from STRATEGIES
+    :param mistake_rate: probability of playing three random cards instead
+    :return: Dictionary with RESULT_FIELDS
+    """
+    game = new_game(seed, mode)
+    rng = game.rng
+    player = STRATEGIES[strategy]
+
+    moves = sets_found = mistakes = 0
+    while not game.is_over() and moves < max_moves:
+        moves += 1
+        if mistake_rate and rng.random() < mistake_rate:
+            move = rng.sample(game.cards_on_board(), 3)
+        else:
+            move = player(game, rng)
+
+        if move == ADD_COLUMN:
+            game.add_column()
+        elif game.play(list(move)):
+            sets_found += 1
+        else:
+            mistakes += 1
+
+    if not game.is_over():
+        end_reason = "move_limit"
+    elif game.cards_left() == 0:
+        end_reason = "deck_empty"
+    else:
+        end_reason = "no_set"
+
+    return {
+        "seed": seed,
+        "mode": mode,
+        "strategy": strategy,
+        "moves": moves,
+        "sets_found": sets_found,
+        "mistakes": mistakes,
+        "score": game.score,
+        "cards_left": game.cards_left(),
+        "board_size": len(game.on_board),
+        "column_used": game.new_column_used,
+        "end_reason": end_reason,
+    }
+
+
+def map_seeds(func, games, seed=0, workers=None, chunksize=1):
+    """Call func with every seed in a pool of processes
+
+    :param func: function of a seed, it must be picklable
+    :param games: number of seeds, they are ``seed .. seed + games - 1``
+    :param workers: number of processes, all CPUs by default,
+        with 1 func is called in current process
+    :return: Iterator of results in order of completion
+    """
+    seeds = range(seed, seed + games)
+    if workers == 1:
+        yield from map(func, seeds)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(func, seeds, chunksize=chunksize)
+
+
+def simulate(games, seed=0, workers=None, chunksize=64, **game_kwargs):
+    """Play games in a pool of processes, as in map_seeds
+
+    :param game_kwargs: arguments passed to play_game
+    :return: Iterator of game results in order of completion
+    """
+    play = partial(play_game, **game_kwargs)
+    return map_seeds(play, games, seed, workers, chunksize)
+
+
+class ResultWriter:
+    """Stream game results to CSV or JSON lines file"""
+
+    def __init__(self, file, fmt="jsonl", fields=RESULT_FIELDS):
+        self.file = file
+        self.fmt = fmt
+        if fmt == "csv":
+            self._csv = csv.DictWriter(file, fieldnames=fields)
+            self._csv.writeheader()
+        elif fmt != "jsonl":
+            raise ValueError(f"Unknown results format: {fmt}")
+
+    def write(self, result):
+        if self.fmt == "csv":
+            self._csv.writerow(result)
+        else:
+            self.file.write(json.dumps(result) + "\n")
+
+
+@contextmanager
+def result_writer(output, fields=RESULT_FIELDS):
+    """ResultWriter of a results file, which is closed at the end
+
+    :param output: path of .csv or .jsonl file, "-" writes JSON lines to stdout
+    """
+    fmt = "csv" if output.endswith(".csv") else "jsonl"
+    out = sys.stdout if output == "-" else open(Path(output), "w", newline="")
+    try:
+        yield ResultWriter(out, fmt, fields)
+    finally:
+        if out is not sys.stdout:
+            out.close()
@@ -0,0 +1,257 @@
+"""Exact solver of a dealt game
+
+With a fixed order of the draw pile every game is a tree of moves:
+play one of the sets on board or add the fifth column, wrong sets are
+never part of the best line. As in the engine, game ends when there
+are no sets on board, variant rules deal more cards before that.
+Solver finds the line with the most sets collected by depth-first search.
+Positions reached by different orders of moves are looked up
+in a transposition table keyed on (board, draw pile position,
+new column used), which keeps only the most recently used positions,
+so memory stays bounded.
+
+Branches that can not collect more sets than the best line found so far
+are cut, so when time runs out the best line found is still reported.
+"""
+from __future__ import annotations
+
+import time
+from collections import OrderedDict, namedtuple
+from functools import partial
+
+from .engine import cards_mask, iter_bits, new_game
+from .simulation import ADD_COLUMN, map_seeds
+
+SOLVER_FIELDS = [
+    "seed",
+    "mode",
+    "cards",
+    "max_sets",
+    "optimal",
+    "column_needed",
+    "nodes",
+    "table_size",
+    "elapsed_ms",
+]
+
+# line is the list of moves, each move is a tuple of set cards or ADD_COLUMN
+Solution = namedtuple("Solution", "sets line optimal nodes table_size elapsed")
+
+
+class OutOfTime(Exception):
+    pass
+
+
+class TranspositionTable:
+    """Values of solved positions, the least recently used are dropped
+    when there are more than ``max_entries`` of them"""
+
+    def __init__(self, max_entries=200_000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        self._entries[key] = entry
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class Solver:
+    """Best line of a game from its current position
+
+    Game is not changed, its board, draw pile and rules are copied.
+
+    :param time_budget: seconds of search, None to search until solved
+    :param allow_column: False to solve the game without the fifth column
+    """
+
+    def __init__(self, game, time_budget=None, max_entries=200_000, allow_column=True):
+        self.rules = game.rules
+        self.cards = game.rules.cards
+        # next card is dealt from the end of the pile
+        self.deck = list(game.deck)
+        self.board = game.board_mask
+        self.column_used = game.new_column_used or not allow_column
+        self.rows = game.rows
+        self.limit = game.rows * game.cols
+        self.time_budget = time_budget
+        self.table = TranspositionTable(max_entries)
+        self.nodes = 0
+        self._deadline = None
+        self._path = []
+        self._best = -1
+        self._best_line = []
+
+    def solve(self):
+        start = time.perf_counter()
+        if self.time_budget is not None:
+            self._deadline = start + self.time_budget
+        on_board = {}
+        sets = []
+        for card_id in iter_bits(self.board):
+            card = self.cards[card_id]
+            sets.extend(self._indexed(self.rules.sets_with(card, on_board)))
+            on_board[card_id] = card
+        try:
+            self._search(self.board, len(self.deck), self.column_used, sets, 0)
+            optimal = True
+        except OutOfTime:
+            optimal = False
+        return Solution(
+            self._best,
+            self._best_line,
+            optimal,
+            self.nodes,
+            len(self.table),
+            time.perf_counter() - start,
+        )
+
+    @staticmethod
+    def _indexed(sets):
+        return [(cards_mask(s), s) for s in sets]
+
+    def _deal(self, board, pos, count, sets):
+        """Put ``count`` cards from the pile on board and index their sets,
+        then more cards while there is no set, if rules say so
+
+        :return: Tuple of board mask, pile position and sets on board
+        """
+        on_board = {i: self.cards[i] for i in iter_bits(board)}
+        sets = list(sets)
+        while pos and (count > 0 or self.rules.deal_until_set and not sets):
+            count -= 1
+            pos -= 1
+            card = self.deck[pos]
+            sets.extend(self._indexed(self.rules.sets_with(card, on_board)))
+            on_board[card.id] = card
+            board |= 1 << card.id
+        return board, pos, sets
+
+    def _moves(self, board, pos, column_used, sets):
+        """Positions after every move, sets first and the fifth column last"""
+        deal = self.rules.set_size if board.bit_count() <= self.limit else 0
+        for mask, cards in sets:
+            left = [s for s in sets if not s[0] & mask]
+            new_board, new_pos, new_sets = self._deal(board & ~mask, pos, deal, left)
+            yield cards, (new_board, new_pos, column_used, new_sets)
+        if not column_used and pos:
+            new_board, new_pos, new_sets = self._deal(board, pos, self.rows, sets)
+            yield ADD_COLUMN, (new_board, new_pos, True, new_sets)
+
+    def _search(self, board, pos, column_used, sets, score):
+        """Most sets collected from the position
+
+        :param score: sets collected before the position
+        :return: Tuple of sets, linked list of moves (move, rest)
+            and True when the value is exact, None when the position
+            can not improve the best line
+        """
+        self.nodes += 1
+        if self._deadline is not None and not self.nodes & 255:
+            if time.perf_counter() > self._deadline:
+                raise OutOfTime
+        if not sets:
+            self._improve(score, 0, None)
+            return 0, None, True
+
+        key = (board, pos, column_used)
+        entry = self.table.get(key)
+        if entry is not None:
+            self._improve(score, *entry)
+            return (*entry, True)
+        bound = (board.bit_count() + pos) // self.rules.set_size
+        if score + bound <= self._best:
+            return None
+
+        best, line, exact = -1, None, True
+        for move, child in self._moves(board, pos, column_used, sets):
+            gain = move is not ADD_COLUMN
+            self._path.append(move)
+            result = self._search(*child, score + gain)
+            self._path.pop()
+            if result is None:
+                exact = False
+                continue
+            exact &= result[2]
+            if result[0] + gain > best:
+                best, line = result[0] + gain, (move, result[1])
+            if best == bound:
+                exact = True
+                break
+
+        if best < 0:
+            return None
+        if exact:
+            self.table.put(key, (best, line))
+        self._improve(score, best, line)
+        return best, line, exact
+
+    def _improve(self, score, value, line):
+        """Keep the line to the position and on from it, if it is the best"""
+        if score + value > self._best:
+            self._best = score + value
+            self._best_line = list(self._path)
+            while line is not None:
+                move, line = line
+                self._best_line.append(move)
+
+
+def analyse(game, time_budget=None, max_entries=200_000):
+    """Solve the game and check if the best result needs the fifth column
+
+    Game is solved again without the column only when its best line
+    adds the column, each solve has its own time budget
+
+    :return: Tuple of Solution and column needed, None when it is not known
+    """
+    solution = Solver(game, time_budget, max_entries).solve()
+    if ADD_COLUMN not in solution.line:
+        return solution, False
+    without = Solver(game, time_budget, max_entries, allow_column=False).solve()
+    if without.sets >= solution.sets:
+        return solution, False
+    if not (solution.optimal and without.optimal):
+        return solution, None
+    return solution, True
+
+
+def solve_game(seed, mode, time_budget=None, max_entries=200_000):
+    """Solve the deal of seed and mode, the same deal as in simulate.py
+
+    :return: Dictionary with SOLVER_FIELDS
+    """
+    game = new_game(seed, mode)
+    solution, column_needed = analyse(game, time_budget, max_entries)
+    return {
+        "seed": seed,
+        "mode": mode,
+        "cards": len(game.cards),
+        "max_sets": solution.sets,
+        "optimal": solution.optimal,
+        "column_needed": column_needed,
+        "nodes": solution.nodes,
+        "table_size": solution.table_size,
+        "elapsed_ms": round(solution.elapsed * 1000, 3),
+    }
+
+
+def solve_games(games, seed=0, workers=None, **solve_kwargs):
+    """Solve deals in a pool of processes, as in simulation.map_seeds
+
+    :param solve_kwargs: arguments passed to solve_game
+    :return: Iterator of results in order of completion
+    """
+    return map_seeds(partial(solve_game, **solve_kwargs), games, seed, workers)
@@ -0,0 +1,102 @@
+"""Batch set detection with NumPy
+
+Boards are given as integer arrays of shape (boards, board_size, features)
+with feature values 0, 1 or 2. Negative value marks an empty board slot.
+Three cards are a set when every feature sums up to 0 modulo 3.
+
+NumPy is optional, check ``available()`` before using this module.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is not a game requirement
+    np = None
+
+
+def available():
+    return np is not None
+
+
+def _powers(n_features):
+    """Place values of features in card id, the first is the most significant"""
+    return 3 ** np.arange(n_features - 1, -1, -1)
+
+
+@lru_cache(maxsize=None)
+def _third_table(n_features):
+    """Id of the card completing set for every pair of card ids
+
+    Table is built once with mod 3 sum rule applied to all cards features
+    """
+    features = features_from_ids(np.arange(3**n_features), n_features)
+    features = features.astype(np.int16)
+    third = (-features[:, None, :] - features[None, :, :]) % 3
+    return (third @ _powers(n_features)).astype(np.intp)
+
+
+def features_from_ids(card_ids, n_features=4):
+    """Convert card ids to feature array, -1 id marks empty slot
+
+    :param card_ids: array-like of shape (boards, board_size) or (board_size,)
+    :return: Array with additional last axis of card features
+    """
+    ids = np.asarray(card_ids, dtype=np.int64)
+    features = ids[..., None] // _powers(n_features) % 3
+    features[ids < 0] = -1
+    return features.astype(np.int8)
+
+
+def find_sets_batch(features, chunk_size=1024):
+    """Count and list sets on many boards at once
+
+    For every pair of cards the third card is found in a table
+    built from mod 3 sum rule and then looked up on the board,
+    so the work is O(board_size^2) per board.
+
+    :param features: array of shape (boards, board_size, features)
+    :param chunk_size: number of boards evaluated in one vectorized step,
+        it bounds memory used by intermediate arrays
+    :return: Tuple of counts array of shape (boards,)
+        and list of (sets, 3) arrays with slot indexes of every set
+    """
+    features = np.asarray(features, dtype=np.int64)
+    if features.ndim != 3:
+        raise ValueError("Features array should have shape (boards, size, features)")
+    boards, board_size, n_features = features.shape
+    powers = _powers(n_features)
+    third_table = _third_table(n_features)
+    empty = (features < 0).any(axis=2)
+    ids = np.where(empty, -1, features @ powers)
+
+    slots = np.arange(board_size)
+    # only pairs i < j, the third card must lie in a later slot than both
+    upper = slots[:, None] < slots[None, :]
+
+    counts = np.empty(boards, dtype=np.intp)
+    sets = []
+    for start in range(0, boards, chunk_size):
+        chunk_ids = ids[start : start + chunk_size]
+        chunk_empty = empty[start : start + chunk_size]
+        n = len(chunk_ids)
+        rows = np.arange(n)[:, None]
+
+        # slot of every card id on board, -1 when card is not there,
+        # empty slots are written to one extra column which is reset after
+        slot_of = np.full((n, 3**n_features + 1), -1, dtype=np.intp)
+        slot_of[rows, np.where(chunk_empty, -1, chunk_ids)] = slots
+        slot_of[:, -1] = -1
+
+        third = third_table[chunk_ids[:, :, None], chunk_ids[:, None, :]]
+        third_slot = slot_of[rows[:, :, None], third]
+        is_set = (third_slot > slots[None, None, :]) & upper
+        is_set &= ~chunk_empty[:, :, None] & ~chunk_empty[:, None, :]
+
+        chunk_counts = is_set.sum(axis=(1, 2))
+        counts[start : start + n] = chunk_counts
+        b, i, j = np.nonzero(is_set)
+        triples = np.stack([i, j, third_slot[b, i, j]], axis=1)
+        sets.extend(np.split(triples, np.cumsum(chunk_counts)[:-1]))
+    return counts, sets
@@ -0,0 +1,86 @@
+"""Play a recorded game again headlessly and as fast as possible
+
+Games are recorded when SET_GAME_RECORD points to a directory:
+
+    SET_GAME_RECORD=logs python run_game.py
+    python replay.py logs/20240101-120000-1234.sgr --trace trace.json
+    python replay.py logs/20240101-120000-1234.sgr --engine --repeat 100
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from game.gamelog import GameLog, replay_game
+
+ROOT = Path(__file__).resolve().parent
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Set Game replay of a game log")
+    parser.add_argument("log", type=Path)
+    parser.add_argument(
+        "-n", "--repeat", type=int, default=1, help="replay the game n times"
+    )
+    parser.add_argument(
+        "--no-draw", action="store_true", help="do not draw window after actions"
+    )
+    parser.add_argument("--trace", help="write Chrome trace of the replay")
+    parser.add_argument(
+        "--engine", action="store_true", help="replay with game engine, no window"
+    )
+    return parser.parse_args()
+
+
+def window_replay(log, args):
+    """Replay in headless game window, as in the game
+
+    :return: Seconds taken by the replays
+    """
+    import pyglet
+
+    pyglet.options["headless"] = True
+    pyglet.resource.path = [str(ROOT / "res")]
+    pyglet.resource.reindex()
+    # replayed game must not replace autosave of the player
+    save_dir = tempfile.mkdtemp(prefix="set-game-replay-")
+    os.environ["SET_GAME_SAVE"] = os.path.join(save_dir, "autosave.sgs")
+
+    from game.director import GameDirector
+    from game.profiler import Profiler
+    from game.replay import replay
+
+    window = GameDirector(width=1024, height=600, caption="Set Game")
+    if args.trace:
+        window.profiler = window.fsm.profiler = Profiler(trace_path=args.trace)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        replay(window, log, draw=not args.no_draw)
+    elapsed = time.perf_counter() - start
+
+    if window.profiler is not None:
+        window.profiler.close()
+    return elapsed
+
+
+def main():
+    args = parse_args()
+    log = GameLog.load(args.log)
+    if args.engine:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            replay_game(log)
+        elapsed = time.perf_counter() - start
+    else:
+        elapsed = window_replay(log, args)
+    print(
+        f"seed {log.seed}, mode {log.mode}, {len(log.events)} events, "
+        f"played {log.events[-1].ms / 1000 if log.events else 0:.1f} s, "
+        f"replayed {args.repeat} times in {elapsed:.3f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
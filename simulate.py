@@ -0,0 +1,64 @@
+"""Play many headless games and save per game results
+
+    python simulate.py --games 100000 --mode quickstart -o quickstart.csv
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+
+from game.constants import FEATURES_NORMAL, FEATURES_QUICKSTART
+from game.simulation import STRATEGIES, result_writer, simulate
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Set Game Monte Carlo simulator")
+    parser.add_argument("-n", "--games", type=int, default=1000)
+    parser.add_argument(
+        "--mode", choices=[FEATURES_QUICKSTART, FEATURES_NORMAL], default=FEATURES_NORMAL
+    )
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="random")
+    parser.add_argument(
+        "--mistake-rate",
+        type=float,
+        default=0.0,
+        help="probability of playing three random cards",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument(
+        "-j", "--workers", type=int, default=None, help="processes, all CPUs by default"
+    )
+    parser.add_argument(
+        "-o", "--output", default="-", help="results file, .csv or .jsonl"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    end_reasons = Counter()
+    sets_found = 0
+    with result_writer(args.output) as writer:
+        for result in simulate(
+            args.games,
+            seed=args.seed,
+            workers=args.workers,
+            mode=args.mode,
+            strategy=args.strategy,
+            mistake_rate=args.mistake_rate,
+        ):
+            writer.write(result)
+            end_reasons[result["end_reason"]] += 1
+            sets_found += result["sets_found"]
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{args.games} games in {elapsed:.2f} s ({args.games / elapsed:.0f} games/s), "
+        f"mean sets found {sets_found / args.games:.2f}, end reasons {dict(end_reasons)}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Solve deals exactly and save the most sets each deal allows
+
+    python solve.py --games 1000 --mode normal --budget 10 -o normal.csv
+    python solve.py --seed 1234 --line
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+
+from game.constants import FEATURES_NORMAL, FEATURES_QUICKSTART
+from game.engine import new_game
+from game.simulation import ADD_COLUMN, result_writer
+from game.solver import SOLVER_FIELDS, Solver, solve_games
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Set Game exact solver")
+    parser.add_argument("-n", "--games", type=int, default=1)
+    parser.add_argument(
+        "--mode", choices=[FEATURES_QUICKSTART, FEATURES_NORMAL], default=FEATURES_NORMAL
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first deal")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=None,
+        help="seconds of search per deal, best line found is reported when it runs out",
+    )
+    parser.add_argument(
+        "--max-entries",
+        type=int,
+        default=200_000,
+        help="positions kept in the transposition table",
+    )
+    parser.add_argument(
+        "--line", action="store_true", help="print the best line of the first deal"
+    )
+    parser.add_argument(
+        "-j", "--workers", type=int, default=None, help="processes, all CPUs by default"
+    )
+    parser.add_argument(
+        "-o", "--output", default="-", help="results file, .csv or .jsonl"
+    )
+    return parser.parse_args()
+
+
+def print_line(seed, mode, budget, max_entries):
+    solution = Solver(new_game(seed, mode), budget, max_entries).solve()
+    quality = "optimal" if solution.optimal else "best found"
+    print(f"seed {seed}: {solution.sets} sets ({quality})", file=sys.stderr)
+    for number, move in enumerate(solution.line, 1):
+        if move == ADD_COLUMN:
+            print(f"{number:>3}. {move}", file=sys.stderr)
+        else:
+            cards = " ".join(str(card) for card in move)
+            print(f"{number:>3}. {cards}", file=sys.stderr)
+
+
+def main():
+    args = parse_args()
+    if args.line:
+        print_line(args.seed, args.mode, args.budget, args.max_entries)
+
+    start = time.perf_counter()
+    optimal = Counter()
+    max_sets = 0
+    with result_writer(args.output, fields=SOLVER_FIELDS) as writer:
+        for result in solve_games(
+            args.games,
+            seed=args.seed,
+            workers=args.workers,
+            mode=args.mode,
+            time_budget=args.budget,
+            max_entries=args.max_entries,
+        ):
+            writer.write(result)
+            optimal[result["optimal"]] += 1
+            max_sets += result["max_sets"]
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{args.games} deals in {elapsed:.2f} s, "
+        f"mean max sets {max_sets / args.games:.2f}, solved exactly {optimal[True]}, "
+        f"out of time {optimal[False]}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()